@@ -0,0 +1,43 @@
+"""create_latest_prices_table
+
+Revision ID: 3c1f9a7d2e41
+Revises: b0a105f857ea
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f9a7d2e41'
+down_revision: Union[str, Sequence[str], None] = 'b0a105f857ea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('latest_prices',
+    sa.Column('ticker', sa.String(length=16), nullable=False),
+    sa.Column('price', sa.Numeric(precision=20, scale=8), nullable=False),
+    sa.Column('ts', sa.BigInteger(), nullable=False),
+    sa.CheckConstraint("ticker IN ('btc_usd', 'eth_usd')", name='check_latest_valid_ticker'),
+    sa.PrimaryKeyConstraint('ticker')
+    )
+    # Заполняем из уже накопленной истории
+    op.execute(
+        """
+        INSERT INTO latest_prices (ticker, price, ts)
+        SELECT DISTINCT ON (ticker) ticker, price, ts
+        FROM prices
+        ORDER BY ticker, ts DESC
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('latest_prices')
@@ -0,0 +1,39 @@
+"""create_price_anomalies_table
+
+Revision ID: 8e2d4b6a9c13
+Revises: 3c1f9a7d2e41
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e2d4b6a9c13'
+down_revision: Union[str, Sequence[str], None] = '3c1f9a7d2e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('price_anomalies',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('ticker', sa.String(length=16), nullable=False),
+    sa.Column('price', sa.Numeric(precision=20, scale=8), nullable=False),
+    sa.Column('ts', sa.BigInteger(), nullable=False),
+    sa.Column('reason', sa.String(length=16), nullable=False),
+    sa.Column('score', sa.Float(), nullable=True),
+    sa.CheckConstraint("ticker IN ('btc_usd', 'eth_usd')", name='check_anomaly_valid_ticker'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_price_anomalies_ticker_ts', 'price_anomalies', ['ticker', 'ts'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_price_anomalies_ticker_ts', table_name='price_anomalies')
+    op.drop_table('price_anomalies')
@@ -1,15 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from dataclasses import asdict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.db.deps import get_db
+from app.schemas.analytics import CorrelationOut, PriceStatsOut, SeriesOut
 from app.schemas.price import PriceOut, Ticker
+from app.services.analytics_service import AnalyticsService, Series
 from app.services.prices_service import PriceService
 
 router = APIRouter(prefix="/prices", tags=["prices"])
 
+# Заголовок ответа /prices: в ответ вошли только последние MAX_ROWS точек
+TRUNCATED_HEADER = "X-Result-Truncated"
+
 
 @router.get("", response_model=list[PriceOut])
 def read_prices(
+    response: Response,
     ticker: Ticker = Query(..., description="Тикер: btc_usd или eth_usd"),
     db: Session = Depends(get_db),
 ):
@@ -18,9 +26,15 @@ def read_prices(
 
     Query params:
       - ticker: обязательный (btc_usd / eth_usd)
+
+    Возвращает не больше MAX_ROWS последних точек; если часть истории
+    не вошла, выставляет заголовок X-Result-Truncated: true.
     """
     service = PriceService(db)
-    return service.get_all(ticker.value)
+    result = service.get_all(ticker.value)
+    if result.truncated:
+        response.headers[TRUNCATED_HEADER] = "true"
+    return result.items
 
 
 @router.get("/latest", response_model=PriceOut)
@@ -40,6 +54,15 @@ def read_latest_price(
     return item
 
 
+@router.get("/latest/all", response_model=list[PriceOut])
+def read_latest_prices(db: Session = Depends(get_db)):
+    """
+    Получить последние цены по всем тикерам, по которым есть данные.
+    """
+    service = PriceService(db)
+    return service.get_latest_all()
+
+
 @router.get("/by-date", response_model=list[PriceOut])
 def read_prices_by_date(
     ticker: Ticker = Query(..., description="Тикер: btc_usd или eth_usd"),
@@ -50,10 +73,122 @@ def read_prices_by_date(
     """
     Получить цены по тикеру в диапазоне времени [from_ts, to_ts] (UNIX timestamp).
 
-    Возвращает 400, если from_ts > to_ts.
+    Возвращает 400, если from_ts > to_ts, и 413, если строк в диапазоне
+    больше лимита.
     """
     if from_ts > to_ts:
         raise HTTPException(status_code=400, detail="from_ts must be <= to_ts")
 
     service = PriceService(db)
     return service.get_by_date(ticker.value, from_ts, to_ts)
+
+
+def _validate_range(from_ts: int, to_ts: int) -> None:
+    if from_ts > to_ts:
+        raise HTTPException(status_code=400, detail="from_ts must be <= to_ts")
+
+
+def _series_response(
+    ticker: Ticker, from_ts: int, to_ts: int, series: Series
+) -> Response:
+    """
+    Отдаёт ряд в колоночном виде, сериализуя его напрямую через pydantic-core:
+    для длинных рядов повторная валидация и json.dumps в FastAPI на порядок дороже.
+    """
+    body = SeriesOut.model_construct(
+        ticker=ticker.value,
+        from_ts=from_ts,
+        to_ts=to_ts,
+        ts=series.ts.tolist(),
+        values=series.values.tolist(),
+    )
+    return Response(content=body.model_dump_json(), media_type="application/json")
+
+
+@router.get("/stats", response_model=PriceStatsOut)
+def read_price_stats(
+    ticker: Ticker = Query(..., description="Тикер: btc_usd или eth_usd"),
+    from_ts: int = Query(..., ge=0, description="Начальный timestamp (UNIX)"),
+    to_ts: int = Query(..., ge=0, description="Конечный timestamp (UNIX)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Сводная статистика по тикеру за [from_ts, to_ts]: count, first/last,
+    min/max, mean, TWAP, суммарная лог-доходность и волатильность доходностей.
+
+    Возвращает 400, если from_ts > to_ts, и 404, если в диапазоне нет данных.
+    """
+    _validate_range(from_ts, to_ts)
+
+    service = AnalyticsService(db)
+    stats = service.get_stats(ticker.value, from_ts, to_ts)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No data for this ticker")
+    return PriceStatsOut(
+        ticker=ticker.value, from_ts=from_ts, to_ts=to_ts, **asdict(stats)
+    )
+
+
+@router.get("/returns", response_model=SeriesOut)
+def read_price_returns(
+    ticker: Ticker = Query(..., description="Тикер: btc_usd или eth_usd"),
+    from_ts: int = Query(..., ge=0, description="Начальный timestamp (UNIX)"),
+    to_ts: int = Query(..., ge=0, description="Конечный timestamp (UNIX)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Логарифмические доходности между соседними точками в диапазоне [from_ts, to_ts].
+
+    Возвращает 400, если from_ts > to_ts, и 413, если строк в диапазоне
+    больше лимита.
+    """
+    _validate_range(from_ts, to_ts)
+
+    service = AnalyticsService(db)
+    series = service.get_returns(ticker.value, from_ts, to_ts)
+    return _series_response(ticker, from_ts, to_ts, series)
+
+
+@router.get("/volatility", response_model=SeriesOut)
+def read_price_volatility(
+    ticker: Ticker = Query(..., description="Тикер: btc_usd или eth_usd"),
+    from_ts: int = Query(..., ge=0, description="Начальный timestamp (UNIX)"),
+    to_ts: int = Query(..., ge=0, description="Конечный timestamp (UNIX)"),
+    window: int = Query(
+        60, ge=2, le=10_000, description="Размер окна (число доходностей)"
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Скользящее стандартное отклонение лог-доходностей по окну из window точек.
+
+    Возвращает 400, если from_ts > to_ts, и 413, если строк в диапазоне
+    больше лимита.
+    """
+    _validate_range(from_ts, to_ts)
+
+    service = AnalyticsService(db)
+    series = service.get_volatility(ticker.value, from_ts, to_ts, window)
+    return _series_response(ticker, from_ts, to_ts, series)
+
+
+@router.get("/correlation", response_model=CorrelationOut)
+def read_price_correlation(
+    ticker: Ticker = Query(..., description="Первый тикер: btc_usd или eth_usd"),
+    other: Ticker = Query(..., description="Второй тикер: btc_usd или eth_usd"),
+    from_ts: int = Query(..., ge=0, description="Начальный timestamp (UNIX)"),
+    to_ts: int = Query(..., ge=0, description="Конечный timestamp (UNIX)"),
+    db: Session = Depends(get_db),
+):
+    """
+    Корреляция лог-доходностей двух тикеров, выровненных по общим timestamp'ам.
+
+    correlation = null, если общих точек недостаточно.
+    Возвращает 400, если from_ts > to_ts, и 413, если строк в диапазоне
+    больше лимита.
+    """
+    _validate_range(from_ts, to_ts)
+
+    service = AnalyticsService(db)
+    result = service.get_correlation(ticker.value, other.value, from_ts, to_ts)
+    return CorrelationOut(from_ts=from_ts, to_ts=to_ts, **asdict(result))
@@ -12,10 +12,6 @@ from app.core.tickers import VALID_TICKERS
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 
@@ -26,6 +22,36 @@ class Settings:
     celery_backend_url: str
     deribit_base_url: str
     tickers: tuple[str, ...]
+    redis_url: str = "redis://localhost:6379/2"
+    price_buffer_stream: str = "prices:buffer"
+    price_buffer_flush_batch: int = 1000
+    statement_timeout_ms: int = 2000
+    range_statement_timeout_ms: int = 15000
+    max_rows: int = 100_000
+    analytics_max_rows: int = 1_000_000
+    slow_query_ms: int = 500
+    slow_query_explain: bool = False
+    db_warmup: bool = True
+    node_ttl_s: int = 30
+    quality_ewma_alpha: float = 0.05
+    quality_z_threshold: float = 8.0
+    quality_warmup: int = 30
+    quality_window: int = 5
+    quality_stale_after_s: int = 300
+
+
+def configure_logging() -> None:
+    """
+    Настройка логирования процесса.
+
+    Вызывается явно при старте API (lifespan) и Celery, а не при импорте,
+    чтобы импорт модулей (тесты, CLI) не менял глобальное состояние логирования.
+    Повторные вызовы ничего не делают.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
 
 
 def _parse_csv(value: str) -> tuple[str, ...]:
@@ -33,6 +59,10 @@ def _parse_csv(value: str) -> tuple[str, ...]:
     return tuple(x for x in items if x)
 
 
+def _parse_bool(value: str) -> bool:
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
     """
@@ -68,4 +98,22 @@ def get_settings() -> Settings:
             "DERIBIT_BASE_URL", "https://www.deribit.com/api/v2"
         ),
         tickers=tickers,
+        redis_url=os.getenv("REDIS_URL", "redis://localhost:6379/2"),
+        price_buffer_stream=os.getenv("PRICE_BUFFER_STREAM", "prices:buffer"),
+        price_buffer_flush_batch=int(os.getenv("PRICE_BUFFER_FLUSH_BATCH", "1000")),
+        statement_timeout_ms=int(os.getenv("STATEMENT_TIMEOUT_MS", "2000")),
+        range_statement_timeout_ms=int(
+            os.getenv("RANGE_STATEMENT_TIMEOUT_MS", "15000")
+        ),
+        max_rows=int(os.getenv("MAX_ROWS", "100000")),
+        analytics_max_rows=int(os.getenv("ANALYTICS_MAX_ROWS", "1000000")),
+        slow_query_ms=int(os.getenv("SLOW_QUERY_MS", "500")),
+        slow_query_explain=_parse_bool(os.getenv("SLOW_QUERY_EXPLAIN", "false")),
+        db_warmup=_parse_bool(os.getenv("DB_WARMUP", "true")),
+        node_ttl_s=int(os.getenv("NODE_TTL_S", "30")),
+        quality_ewma_alpha=float(os.getenv("QUALITY_EWMA_ALPHA", "0.05")),
+        quality_z_threshold=float(os.getenv("QUALITY_Z_THRESHOLD", "8.0")),
+        quality_warmup=int(os.getenv("QUALITY_WARMUP", "30")),
+        quality_window=int(os.getenv("QUALITY_WINDOW", "5")),
+        quality_stale_after_s=int(os.getenv("QUALITY_STALE_AFTER_S", "300")),
     )
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from functools import lru_cache
+
+import redis
+
+from app.core.config import get_settings
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> redis.Redis:
+    """
+    Redis-клиент процесса (буфер цен, реестр узлов), создаётся лениво.
+    """
+    return redis.Redis.from_url(get_settings().redis_url)
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 from decimal import Decimal
-from typing import Mapping
+from typing import Mapping, Sequence
 
-from sqlalchemy.dialects.postgresql import insert
+import numpy as np
+from sqlalchemy import Float, LargeBinary, Row, cast, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
 from sqlalchemy.orm import Session
 
-from app.db.models import Price
+from app.db.models import LatestPrice, Price, PriceAnomaly
 
 
 def save_price(session: Session, ticker: str, price: Decimal, ts: int) -> bool:
@@ -22,6 +24,7 @@ def save_price(session: Session, ticker: str, price: Decimal, ts: int) -> bool:
         .on_conflict_do_nothing(index_elements=["ticker", "ts"])
     )
     result = session.execute(stmt)
+    upsert_latest_prices(session, [{"ticker": ticker, "price": price, "ts": ts}])
     return result.rowcount == 1
 
 
@@ -30,29 +33,101 @@ def save_prices(session: Session, prices: Mapping[str, Decimal], ts: int) -> int
     Сохраняет пачку цен за один timestamp с обработкой дубликатов.
     Возвращает количество успешно добавленных строк.
     """
-    if not prices:
+    rows = [
+        {"ticker": ticker, "price": price, "ts": ts} for ticker, price in prices.items()
+    ]
+    return save_price_rows(session, rows)
+
+
+def save_price_rows(session: Session, rows: Sequence[Mapping[str, object]]) -> int:
+    """
+    Сохраняет произвольную пачку строк {ticker, price, ts} одним INSERT
+    с обработкой дубликатов (повторная запись тех же строк безопасна).
+    Возвращает количество успешно добавленных строк.
+    """
+    if not rows:
         return 0
 
-    rows = [{"ticker": ticker, "price": price, "ts": ts} for ticker, price in prices.items()]
-    stmt = insert(Price).values(rows).on_conflict_do_nothing(
-        index_elements=["ticker", "ts"]
+    stmt = (
+        insert(Price)
+        .values(list(rows))
+        .on_conflict_do_nothing(index_elements=["ticker", "ts"])
     )
     result = session.execute(stmt)
+    upsert_latest_prices(session, rows)
     return result.rowcount or 0
 
 
-def get_prices(db: Session, ticker: str) -> list[Price]:
-    return db.query(Price).filter(Price.ticker == ticker).order_by(Price.ts.asc()).all()
+def save_anomaly_rows(session: Session, rows: Sequence[Mapping[str, object]]) -> int:
+    """
+    Сохраняет пачку строк карантина {ticker, price, ts, reason, score}
+    с обработкой дубликатов. Возвращает количество добавленных строк.
+    """
+    if not rows:
+        return 0
 
+    stmt = (
+        insert(PriceAnomaly)
+        .values(list(rows))
+        .on_conflict_do_nothing(index_elements=["ticker", "ts"])
+    )
+    result = session.execute(stmt)
+    return result.rowcount or 0
 
-def get_latest_price(db: Session, ticker: str) -> Price | None:
-    return (
-        db.query(Price).filter(Price.ticker == ticker).order_by(Price.ts.desc()).first()
+
+def upsert_latest_prices(
+    session: Session, rows: Sequence[Mapping[str, object]]
+) -> None:
+    """
+    Обновляет latest_prices по пачке строк {ticker, price, ts}.
+
+    Из пачки берётся самая свежая строка каждого тикера (ON CONFLICT DO UPDATE
+    не может обновить одну строку дважды). Обновление идёт только при строго
+    большем ts: более старые пачки не перезаписывают последнюю цену, а повтор
+    того же ts (в prices он отброшен ON CONFLICT DO NOTHING) не подменяет её
+    значением, которого нет в prices.
+    """
+    latest: dict[str, Mapping[str, object]] = {}
+    for row in rows:
+        current = latest.get(row["ticker"])
+        if current is None or row["ts"] > current["ts"]:
+            latest[row["ticker"]] = row
+    if not latest:
+        return
+
+    values = [
+        {"ticker": row["ticker"], "price": row["price"], "ts": row["ts"]}
+        for row in latest.values()
+    ]
+    stmt = insert(LatestPrice).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["ticker"],
+        set_={"price": stmt.excluded.price, "ts": stmt.excluded.ts},
+        where=stmt.excluded.ts > LatestPrice.ts,
     )
+    session.execute(stmt)
+
+
+def get_prices(db: Session, ticker: str, limit: int | None = None) -> list[Price]:
+    """
+    Цены по тикеру по возрастанию ts; при заданном limit — только последние limit точек.
+    """
+    query = db.query(Price).filter(Price.ticker == ticker)
+    if limit is None:
+        return query.order_by(Price.ts.asc()).all()
+    return query.order_by(Price.ts.desc()).limit(limit).all()[::-1]
+
+
+def get_latest_price(db: Session, ticker: str) -> LatestPrice | None:
+    return db.get(LatestPrice, ticker)
+
+
+def get_latest_prices(db: Session) -> list[LatestPrice]:
+    return db.query(LatestPrice).order_by(LatestPrice.ticker.asc()).all()
 
 
 def get_prices_by_date(
-    db: Session, ticker: str, from_ts: int, to_ts: int
+    db: Session, ticker: str, from_ts: int, to_ts: int, limit: int | None = None
 ) -> list[Price]:
     return (
         db.query(Price)
@@ -62,5 +137,96 @@ def get_prices_by_date(
             Price.ts <= to_ts,
         )
         .order_by(Price.ts.asc())
+        .limit(limit)
         .all()
     )
+
+
+def get_price_stats(db: Session, ticker: str, from_ts: int, to_ts: int) -> Row | None:
+    """
+    Сводная статистика ряда цен за диапазон, посчитанная на стороне БД.
+
+    Возвращает одну строку (count, first, last, min, max, mean, twap,
+    volatility) или None, если в диапазоне нет точек. first/last — цены
+    строк без предыдущей/следующей точки, volatility — stddev_samp
+    лог-доходностей к предыдущей цене, twap — цены, взвешенные длительностью
+    до следующей точки (NULL для единственной точки).
+    """
+    price = cast(Price.price, Float)
+    rows = (
+        select(
+            Price.ts.label("ts"),
+            price.label("price"),
+            func.lag(price, type_=Float)
+            .over(order_by=Price.ts.asc())
+            .label("prev_price"),
+            func.lead(Price.ts).over(order_by=Price.ts.asc()).label("next_ts"),
+        )
+        .where(
+            Price.ticker == ticker,
+            Price.ts >= from_ts,
+            Price.ts <= to_ts,
+        )
+        .subquery()
+    )
+    duration = rows.c.next_ts - rows.c.ts
+    stmt = select(
+        func.count().label("count"),
+        func.max(rows.c.price).filter(rows.c.prev_price.is_(None)).label("first"),
+        func.max(rows.c.price).filter(rows.c.next_ts.is_(None)).label("last"),
+        func.min(rows.c.price).label("min"),
+        func.max(rows.c.price).label("max"),
+        func.avg(rows.c.price).label("mean"),
+        (
+            func.sum(rows.c.price * duration, type_=Float)
+            / func.nullif(func.sum(duration), 0, type_=Float)
+        ).label("twap"),
+        func.stddev_samp(func.ln(rows.c.price / rows.c.prev_price)).label("volatility"),
+    )
+    row = db.execute(stmt).one()
+    return row if row.count else None
+
+
+def get_price_arrays(
+    db: Session, ticker: str, from_ts: int, to_ts: int, limit: int | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Загружает ряд цен одним запросом в виде колоночных NumPy-массивов (ts, price).
+
+    Колонки склеиваются на стороне БД в два bytea из значений в бинарном
+    формате PostgreSQL (int8send/float8send, big-endian) и приходят одной
+    строкой; на клиенте они читаются через np.frombuffer без разбора текста
+    и без Row/Decimal на каждую точку.
+    """
+    rows = (
+        select(Price.ts.label("ts"), cast(Price.price, Float).label("price"))
+        .where(
+            Price.ticker == ticker,
+            Price.ts >= from_ts,
+            Price.ts <= to_ts,
+        )
+        .order_by(Price.ts.asc())
+        .limit(limit)
+        .subquery()
+    )
+    no_separator = literal_column("''::bytea")
+    stmt = select(
+        func.string_agg(
+            func.int8send(rows.c.ts),
+            aggregate_order_by(no_separator, rows.c.ts.asc()),
+            type_=LargeBinary,
+        ),
+        func.string_agg(
+            func.float8send(rows.c.price),
+            aggregate_order_by(no_separator, rows.c.ts.asc()),
+            type_=LargeBinary,
+        ),
+    )
+    ts_bytes, price_bytes = db.execute(stmt).one()
+    if not ts_bytes:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+
+    return (
+        np.frombuffer(ts_bytes, dtype=">i8").astype(np.int64),
+        np.frombuffer(price_bytes, dtype=">f8").astype(np.float64),
+    )
@@ -1,25 +1,33 @@
 from __future__ import annotations
 
-from collections.abc import Generator
+import asyncio
+from collections.abc import AsyncGenerator
 from contextlib import contextmanager
-from sqlalchemy.orm import Session
 
-from app.db.session import create_session_factory
+from fastapi import Request
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-SessionLocal = create_session_factory()
+from app.db.query_budget import cancel_on_disconnect
+from app.db.session import get_session_factory
 
 
-def get_db() -> Generator[Session, None, None]:
+async def get_db(request: Request) -> AsyncGenerator[Session, None]:
     """
     FastAPI dependency: предоставляет SQLAlchemy Session и гарантирует закрытие.
 
+    Пока запрос обрабатывается, следит за отключением клиента и отменяет
+    выполняющийся SQL-запрос, чтобы не держать соединение пула впустую.
+
     Используется через Depends(get_db) в роутерах.
     """
-    db = SessionLocal()
+    db = get_session_factory()()
+    watcher = asyncio.create_task(cancel_on_disconnect(request, db))
     try:
         yield db
     finally:
-        db.close()
+        watcher.cancel()
+        await run_in_threadpool(db.close)
 
 
 @contextmanager
@@ -28,7 +36,7 @@ def get_db_context():
     Контекстный менеджер для использования в Celery задачах.
     Гарантирует правильное закрытие сессии.
     """
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
         db.commit()
@@ -1,6 +1,6 @@
 from decimal import Decimal
 
-from sqlalchemy import BigInteger, CheckConstraint, Index, Numeric, String
+from sqlalchemy import BigInteger, CheckConstraint, Float, Index, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.tickers import VALID_TICKERS
@@ -27,3 +27,53 @@ class Price(Base):
             name="check_valid_ticker",
         ),
     )
+
+
+class LatestPrice(Base):
+    """
+    Последняя цена по каждому тикеру (одна строка на тикер).
+
+    Поддерживается upsert'ом в той же транзакции, что и вставка в prices,
+    поэтому чтение последней цены не зависит от объёма истории.
+    """
+
+    __tablename__ = "latest_prices"
+
+    ticker: Mapped[str] = mapped_column(String(16), primary_key=True)
+    price: Mapped[Decimal] = mapped_column(Numeric(20, 8), nullable=False)
+
+    ts: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        CheckConstraint(
+            f"ticker IN ({', '.join(repr(t) for t in VALID_TICKERS)})",
+            name="check_latest_valid_ticker",
+        ),
+    )
+
+
+class PriceAnomaly(Base):
+    """
+    Карантин цен, не прошедших проверку качества при сборе (выброс, замёрзшее значение).
+    В prices и агрегаты такие значения не попадают.
+    """
+
+    __tablename__ = "price_anomalies"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+
+    ticker: Mapped[str] = mapped_column(String(16), nullable=False)
+    price: Mapped[Decimal] = mapped_column(Numeric(20, 8), nullable=False)
+
+    ts: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+    reason: Mapped[str] = mapped_column(String(16), nullable=False)
+    score: Mapped[float | None] = mapped_column(Float, nullable=True)
+
+    __table_args__ = (
+        Index("uq_price_anomalies_ticker_ts", "ticker", "ts", unique=True),
+        CheckConstraint(
+            f"ticker IN ({', '.join(repr(t) for t in VALID_TICKERS)})",
+            name="check_anomaly_valid_ticker",
+        ),
+    )
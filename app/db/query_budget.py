@@ -0,0 +1,179 @@
+"""
+Бюджет запросов к БД: statement timeout, лимиты строк, лог медленных запросов
+и отмена запроса при отключении клиента.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING
+
+from sqlalchemy import Engine, event, text
+from sqlalchemy.orm import Session, sessionmaker
+
+if TYPE_CHECKING:
+    from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+# Период сбора цен (см. beat_schedule) — из него оценивается размер диапазона в строках
+SAMPLE_INTERVAL_S = 60
+
+_EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+
+class RowLimitExceeded(Exception):
+    """
+    Диапазон не помещается в лимит строк: ответ был бы усечён.
+    """
+
+    def __init__(self, limit: int) -> None:
+        super().__init__(
+            f"Range exceeds the limit of {limit} rows, narrow from_ts/to_ts"
+        )
+        self.limit = limit
+
+
+def apply_statement_timeout(db: Session, timeout_ms: int) -> None:
+    """
+    Устанавливает statement_timeout для текущей транзакции сессии (SET LOCAL).
+    """
+    db.execute(
+        text("SELECT set_config('statement_timeout', :value, true)"),
+        {"value": str(timeout_ms)},
+    )
+
+
+def row_limit_for_range(from_ts: int, to_ts: int, max_rows: int) -> int:
+    """
+    Лимит строк для диапазона [from_ts, to_ts] по одному тикеру.
+
+    Ожидаемое число точек — одна на SAMPLE_INTERVAL_S; берём двойной запас
+    на ретраи и ручные загрузки, но не больше max_rows. Сам по себе размер
+    диапазона ошибкой не считается: RowLimitExceeded бросает только
+    ensure_within_row_limit по фактически выбранным строкам.
+    """
+    expected = (to_ts - from_ts) // SAMPLE_INTERVAL_S + 1
+    return max(1, min(max_rows, expected * 2))
+
+
+def ensure_within_row_limit(rows: int, limit: int) -> None:
+    """
+    Проверяет результат, выбранный с LIMIT limit + 1: лишняя строка
+    означает, что диапазон не поместился в лимит.
+    """
+    if rows > limit:
+        raise RowLimitExceeded(limit)
+
+
+def install_slow_query_log(
+    engine: Engine, threshold_ms: int, explain: bool = False
+) -> None:
+    """
+    Логирует запросы дольше threshold_ms через события Engine.
+
+    При explain=True для медленных SELECT дополнительно снимается
+    EXPLAIN (ANALYZE, BUFFERS) — запрос выполняется повторно, поэтому
+    включать стоит только на время диагностики. Упавшие запросы (в том числе
+    прерванные statement timeout'ом или отменой) логируются всегда,
+    со временем выполнения и ошибкой.
+    """
+
+    # Время старта хранится на контексте выполнения, а не в conn.info:
+    # при ошибке запроса after_cursor_execute не вызывается, и стек
+    # в conn.info копился бы на соединениях пула.
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        context._query_start_time = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed_ms = (time.perf_counter() - context._query_start_time) * 1000
+        if elapsed_ms < threshold_ms:
+            return
+
+        logger.warning(f"Slow query ({elapsed_ms:.0f} ms): {statement}")
+        if explain and not executemany and _is_select(statement):
+            plan = _explain_analyze(
+                conn.connection.dbapi_connection, statement, parameters
+            )
+            if plan:
+                logger.warning(f"Slow query plan:\n{plan}")
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        start = getattr(exception_context.execution_context, "_query_start_time", None)
+        if start is None or exception_context.statement is None:
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.warning(
+            f"Failed query ({elapsed_ms:.0f} ms): {exception_context.statement} "
+            f"({exception_context.original_exception!r})"
+        )
+
+
+def _is_select(statement: str) -> bool:
+    return statement.lstrip().upper().startswith("SELECT")
+
+
+def _explain_analyze(dbapi_connection, statement: str, parameters) -> str | None:
+    """
+    Выполняет EXPLAIN (ANALYZE, BUFFERS) в savepoint на том же соединении,
+    чтобы ошибка (например, statement timeout) не прервала транзакцию запроса.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+        try:
+            cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception as e:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+            logger.info(f"Failed to capture slow query plan: {e}")
+            return None
+        cursor.execute(f"RELEASE SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+        return plan
+    finally:
+        cursor.close()
+
+
+def install_cancel_support(factory: sessionmaker) -> None:
+    """
+    Запоминает DBAPI-соединение сессии при старте транзакции,
+    чтобы его текущий запрос можно было отменить из другого потока.
+    """
+
+    @event.listens_for(factory, "after_begin")
+    def _remember_dbapi_connection(session, transaction, connection):
+        session.info["dbapi_connection"] = connection.connection.dbapi_connection
+
+
+def cancel_running_query(db: Session) -> bool:
+    """
+    Отменяет выполняющийся запрос сессии на стороне сервера (pg_cancel).
+    Возвращает False, если у сессии нет активного соединения.
+    """
+    cancel = getattr(db.info.get("dbapi_connection"), "cancel", None)
+    if cancel is None:
+        return False
+    cancel()
+    return True
+
+
+async def cancel_on_disconnect(
+    request: Request, db: Session, poll_interval_s: float = 0.5
+) -> None:
+    """
+    Ждёт отключения клиента и отменяет запрос сессии, освобождая соединение пула.
+    """
+    while not await request.is_disconnected():
+        await asyncio.sleep(poll_interval_s)
+
+    if cancel_running_query(db):
+        logger.info(f"Client disconnected, query cancelled: {request.url.path}")
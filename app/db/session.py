@@ -1,9 +1,16 @@
 from __future__ import annotations
 
-from sqlalchemy import Engine, create_engine
-from sqlalchemy.orm import sessionmaker
+import logging
+from functools import lru_cache
+
+from sqlalchemy import Engine, create_engine, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.core.config import get_settings
+from app.db.query_budget import install_cancel_support, install_slow_query_log
+
+logger = logging.getLogger(__name__)
 
 
 def create_db_engine() -> Engine:
@@ -11,14 +18,73 @@ def create_db_engine() -> Engine:
     Создаёт SQLAlchemy Engine на основе настроек проекта.
 
     Вынесено в фабрику, чтобы упростить тестирование и конфигурирование.
+    statement_timeout по умолчанию задаётся один раз при открытии соединения
+    (без лишнего round-trip'а на каждый запрос); более длинные бюджеты
+    диапазонов выставляются через SET LOCAL (см. apply_statement_timeout).
     """
     settings = get_settings()
-    return create_engine(settings.database_url, pool_pre_ping=True)
+    connect_args = {}
+    if make_url(settings.database_url).get_backend_name() == "postgresql":
+        connect_args["options"] = (
+            f"-c statement_timeout={settings.statement_timeout_ms}"
+        )
+    engine = create_engine(
+        settings.database_url, pool_pre_ping=True, connect_args=connect_args
+    )
+    install_slow_query_log(
+        engine, settings.slow_query_ms, explain=settings.slow_query_explain
+    )
+    return engine
 
 
-def create_session_factory() -> sessionmaker:
+def create_session_factory(engine: Engine | None = None) -> sessionmaker[Session]:
     """
     Создаёт фабрику SQLAlchemy Session (sessionmaker) поверх Engine.
     """
-    engine = create_db_engine()
-    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    if engine is None:
+        engine = create_db_engine()
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    install_cancel_support(factory)
+    return factory
+
+
+@lru_cache(maxsize=1)
+def get_engine() -> Engine:
+    """
+    Engine процесса, создаётся лениво при первом обращении (а не при импорте).
+    """
+    return create_db_engine()
+
+
+@lru_cache(maxsize=1)
+def get_session_factory() -> sessionmaker[Session]:
+    """
+    Фабрика Session процесса поверх get_engine(), создаётся лениво.
+    """
+    return create_session_factory(get_engine())
+
+
+def warm_up_pool() -> None:
+    """
+    Открывает и возвращает в пул одно соединение, чтобы первый запрос
+    не платил за установку соединения. Недоступная БД не мешает старту:
+    ошибка логируется, соединение будет открыто при первом запросе.
+    """
+    try:
+        with get_engine().connect():
+            pass
+    except SQLAlchemyError as e:
+        logger.warning(f"Database warm-up failed, continuing without it: {e}")
+
+
+def dispose_engine() -> None:
+    """
+    Закрывает пул соединений и сбрасывает закэшированные Engine/sessionmaker.
+
+    Используется при остановке API и Celery worker'а; следующий вызов
+    get_engine() создаст Engine заново.
+    """
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
+    get_session_factory.cache_clear()
+    get_engine.cache_clear()
@@ -1,12 +1,49 @@
-from fastapi import FastAPI
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 
 from app.api.routes import router as prices_router
+from app.core.config import configure_logging, get_settings
+from app.db.query_budget import RowLimitExceeded
+from app.db.session import dispose_engine, get_session_factory, warm_up_pool
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """
+    Жизненный цикл API: конфигурация, Engine и sessionmaker создаются
+    при старте процесса, а не при импорте; в пул заранее открывается одно
+    соединение (DB_WARMUP); пул соединений закрывается при остановке.
+    """
+    configure_logging()
+    settings = get_settings()
+    get_session_factory()
+    if settings.db_warmup:
+        await asyncio.to_thread(warm_up_pool)
+    try:
+        yield
+    finally:
+        dispose_engine()
 
-app = FastAPI(title="Deribit Price Tracker")
+
+app = FastAPI(title="Deribit Price Tracker", lifespan=lifespan)
 
 app.include_router(prices_router)
 
 
+@app.exception_handler(RowLimitExceeded)
+async def row_limit_exceeded_handler(
+    _request: Request, exc: RowLimitExceeded
+) -> JSONResponse:
+    """
+    Строк в диапазоне больше лимита: 413 вместо молча усечённого ответа.
+    """
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+
 @app.get("/health")
 def health():
     """
@@ -0,0 +1,42 @@
+from pydantic import BaseModel
+
+
+class PriceStatsOut(BaseModel):
+    """Pydantic-модель сводной статистики по тикеру за диапазон."""
+
+    ticker: str
+    from_ts: int
+    to_ts: int
+    count: int
+    first: float
+    last: float
+    min: float
+    max: float
+    mean: float
+    twap: float
+    log_return: float
+    volatility: float | None
+
+
+class SeriesOut(BaseModel):
+    """
+    Pydantic-модель производного временного ряда в колоночном виде:
+    values[i] относится к моменту ts[i].
+    """
+
+    ticker: str
+    from_ts: int
+    to_ts: int
+    ts: list[int]
+    values: list[float]
+
+
+class CorrelationOut(BaseModel):
+    """Pydantic-модель корреляции доходностей двух тикеров."""
+
+    ticker: str
+    other: str
+    from_ts: int
+    to_ts: int
+    count: int
+    correlation: float | None
@@ -0,0 +1,91 @@
+"""
+Векторизованные вычисления над рядами цен (NumPy).
+
+Все функции принимают колоночные массивы, отсортированные по ts по возрастанию,
+и не обращаются к БД — это упрощает тестирование и переиспользование.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class PriceStats:
+    """Сводная статистика по ряду цен за диапазон (считается в БД, см. crud)."""
+
+    count: int
+    first: float
+    last: float
+    min: float
+    max: float
+    mean: float
+    twap: float
+    log_return: float
+    volatility: float | None
+
+
+def _finite_or_none(value: float) -> float | None:
+    return float(value) if np.isfinite(value) else None
+
+
+def log_returns(prices: np.ndarray) -> np.ndarray:
+    """
+    Логарифмические доходности: r[i] = ln(p[i + 1] / p[i]).
+
+    Длина результата на 1 меньше длины входа.
+    """
+    if prices.size < 2:
+        return np.empty(0, dtype=np.float64)
+    return np.diff(np.log(prices))
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Скользящее выборочное стандартное отклонение (ddof=1) за O(n)
+    через кумулятивные суммы.
+
+    Возвращает массив длины len(values) - window + 1
+    (пустой, если точек меньше, чем window).
+    """
+    if window < 2:
+        raise ValueError("window must be >= 2")
+    n = values.size
+    if n < window:
+        return np.empty(0, dtype=np.float64)
+
+    # Центрирование уменьшает потерю точности в разности кумулятивных сумм
+    centered = values - values.mean()
+    csum = np.concatenate(([0.0], np.cumsum(centered)))
+    csum_sq = np.concatenate(([0.0], np.cumsum(centered * centered)))
+
+    win_sum = csum[window:] - csum[:-window]
+    win_sum_sq = csum_sq[window:] - csum_sq[:-window]
+    var = (win_sum_sq - win_sum * win_sum / window) / (window - 1)
+    return np.sqrt(np.clip(var, 0.0, None))
+
+
+def returns_correlation(
+    ts_a: np.ndarray, prices_a: np.ndarray, ts_b: np.ndarray, prices_b: np.ndarray
+) -> tuple[float | None, int]:
+    """
+    Корреляция Пирсона логарифмических доходностей двух тикеров.
+
+    Ряды выравниваются по общим timestamp'ам. Возвращает (корреляция, число
+    использованных доходностей); корреляция None, если данных недостаточно
+    или один из рядов постоянен.
+    """
+    _, idx_a, idx_b = np.intersect1d(
+        ts_a, ts_b, assume_unique=True, return_indices=True
+    )
+    returns_a = log_returns(prices_a[idx_a])
+    returns_b = log_returns(prices_b[idx_b])
+    n = int(returns_a.size)
+    if n < 2:
+        return None, n
+
+    if returns_a.std() == 0 or returns_b.std() == 0:
+        return None, n
+    return _finite_or_none(np.corrcoef(returns_a, returns_b)[0, 1]), n
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db import crud
+from app.db.query_budget import (
+    apply_statement_timeout,
+    ensure_within_row_limit,
+    row_limit_for_range,
+)
+from app.services import analytics
+from app.services.analytics import PriceStats
+
+
+@dataclass(frozen=True)
+class Series:
+    """Производный временной ряд в колоночном виде (ts[i] — момент values[i])."""
+
+    ts: np.ndarray
+    values: np.ndarray
+
+
+@dataclass(frozen=True)
+class Correlation:
+    """Результат корреляции доходностей двух тикеров."""
+
+    ticker: str
+    other: str
+    count: int
+    correlation: float | None
+
+
+@dataclass(frozen=True)
+class AnalyticsService:
+    """
+    Сервисный слой аналитики по ценам.
+
+    Сводную статистику считает агрегатами на стороне БД; для рядов и корреляции
+    загружает диапазон одним запросом в колоночные массивы и считает метрики
+    векторизованно (см. app.services.analytics). Диапазон, не помещающийся
+    в лимит строк, отклоняется RowLimitExceeded: метрики по усечённому ряду
+    (last, log_return) были бы неверными.
+    """
+
+    db: Session
+
+    def _load(
+        self, ticker: str, from_ts: int, to_ts: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        settings = get_settings()
+        apply_statement_timeout(self.db, settings.range_statement_timeout_ms)
+        limit = row_limit_for_range(from_ts, to_ts, settings.analytics_max_rows)
+        ts, prices = crud.get_price_arrays(
+            self.db, ticker, from_ts, to_ts, limit=limit + 1
+        )
+        ensure_within_row_limit(ts.size, limit)
+        return ts, prices
+
+    def get_stats(self, ticker: str, from_ts: int, to_ts: int) -> PriceStats | None:
+        """
+        Сводная статистика по тикеру за диапазон; None, если данных нет.
+        """
+        apply_statement_timeout(self.db, get_settings().range_statement_timeout_ms)
+        row = crud.get_price_stats(self.db, ticker, from_ts, to_ts)
+        if row is None:
+            return None
+        return PriceStats(
+            count=row.count,
+            first=row.first,
+            last=row.last,
+            min=row.min,
+            max=row.max,
+            mean=row.mean,
+            # У единственной точки нет длительности: TWAP равен её цене
+            twap=row.first if row.twap is None else row.twap,
+            log_return=math.log(row.last / row.first),
+            volatility=row.volatility,
+        )
+
+    def get_returns(self, ticker: str, from_ts: int, to_ts: int) -> Series:
+        """
+        Логарифмические доходности; ts точки — момент второй цены в паре.
+        """
+        ts, prices = self._load(ticker, from_ts, to_ts)
+        return Series(ts=ts[1:], values=analytics.log_returns(prices))
+
+    def get_volatility(
+        self, ticker: str, from_ts: int, to_ts: int, window: int
+    ) -> Series:
+        """
+        Скользящее стандартное отклонение лог-доходностей по окну из window точек.
+        """
+        ts, prices = self._load(ticker, from_ts, to_ts)
+        values = analytics.rolling_std(analytics.log_returns(prices), window)
+        return Series(ts=ts[window:], values=values)
+
+    def get_correlation(
+        self, ticker: str, other: str, from_ts: int, to_ts: int
+    ) -> Correlation:
+        """
+        Корреляция лог-доходностей двух тикеров, выровненных по общим ts.
+        """
+        ts_a, prices_a = self._load(ticker, from_ts, to_ts)
+        ts_b, prices_b = self._load(other, from_ts, to_ts)
+        value, count = analytics.returns_correlation(ts_a, prices_a, ts_b, prices_b)
+        return Correlation(ticker=ticker, other=other, count=count, correlation=value)
@@ -0,0 +1,133 @@
+"""
+Горизонтальное масштабирование сбора цен.
+
+- HashRing — консистентное хеширование тикеров по узлам (worker'ам): при
+  добавлении или уходе узла переезжает только ~1/N тикеров.
+- NodeRegistry — реестр живых узлов в Redis (heartbeat с TTL).
+- SlotLeader — выбор лидера на каждый слот расписания: из нескольких
+  планировщиков слот запускает только тот, кто первым его захватил.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import redis
+
+from app.core.config import get_settings
+from app.core.redis_client import get_redis
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+@dataclass(frozen=True)
+class HashRing:
+    """
+    Кольцо консистентного хеширования с виртуальными узлами.
+    """
+
+    nodes: tuple[str, ...]
+    replicas: int = 64
+    _points: tuple[int, ...] = field(init=False, repr=False)
+    _owners: tuple[str, ...] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        ring = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node in set(self.nodes)
+            for i in range(self.replicas)
+        )
+        object.__setattr__(self, "_points", tuple(point for point, _ in ring))
+        object.__setattr__(self, "_owners", tuple(node for _, node in ring))
+
+    def node_for(self, key: str) -> str:
+        """
+        Узел, владеющий ключом: первая точка кольца по часовой стрелке.
+        """
+        if not self._points:
+            raise ValueError("HashRing has no nodes")
+        idx = bisect.bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[idx]
+
+    def assign(self, keys: Iterable[str]) -> dict[str, tuple[str, ...]]:
+        """
+        Распределяет ключи по узлам; узлы без ключей в результат не попадают.
+        """
+        assignment: dict[str, list[str]] = {}
+        for key in keys:
+            assignment.setdefault(self.node_for(key), []).append(key)
+        return {node: tuple(items) for node, items in assignment.items()}
+
+
+@dataclass(frozen=True)
+class NodeRegistry:
+    """
+    Реестр живых узлов сбора цен: sorted set {node: время последнего heartbeat}.
+    Узел считается ушедшим, если не присылал heartbeat дольше ttl_s.
+    """
+
+    client: redis.Redis
+    key: str = "ingest:nodes"
+    ttl_s: float = 30.0
+
+    def heartbeat(self, node: str, now: float | None = None) -> None:
+        self.client.zadd(self.key, {node: time.time() if now is None else now})
+
+    def leave(self, node: str) -> None:
+        self.client.zrem(self.key, node)
+
+    def live_nodes(self, now: float | None = None) -> tuple[str, ...]:
+        """
+        Живые узлы в детерминированном порядке; заодно вычищает устаревшие.
+        """
+        deadline = (time.time() if now is None else now) - self.ttl_s
+        self.client.zremrangebyscore(self.key, "-inf", deadline)
+        members = self.client.zrangebyscore(self.key, deadline, "+inf")
+        return tuple(sorted(m.decode() if isinstance(m, bytes) else m for m in members))
+
+
+@dataclass(frozen=True)
+class SlotLeader:
+    """
+    Выбор лидера на слот расписания через SET NX с TTL.
+
+    Несколько планировщиков (beat) могут запускать одну и ту же задачу —
+    слот обработает только первый, захвативший ключ слота.
+    """
+
+    client: redis.Redis
+    key_prefix: str = "ingest:leader"
+    ttl_s: int = 120
+
+    def try_lead(self, slot: int, node: str) -> bool:
+        return bool(
+            self.client.set(f"{self.key_prefix}:{slot}", node, nx=True, ex=self.ttl_s)
+        )
+
+    def leader_of(self, slot: int) -> str | None:
+        value = self.client.get(f"{self.key_prefix}:{slot}")
+        return value.decode() if isinstance(value, bytes) else value
+
+
+def node_queue(node: str) -> str:
+    """
+    Имя персональной очереди Celery узла сбора цен.
+    """
+    return f"ingest.{node}"
+
+
+@lru_cache(maxsize=1)
+def get_node_registry() -> NodeRegistry:
+    return NodeRegistry(client=get_redis(), ttl_s=get_settings().node_ttl_s)
+
+
+@lru_cache(maxsize=1)
+def get_slot_leader() -> SlotLeader:
+    return SlotLeader(client=get_redis())
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+
+import redis
+from redis.exceptions import LockNotOwnedError
+
+from app.core.config import get_settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PriceRow = dict[str, object]
+
+
+@dataclass(frozen=True)
+class PriceBuffer:
+    """
+    Write-ahead буфер цен на Redis Stream.
+
+    Воркер сбора цен только дописывает полученные значения в поток и сразу
+    завершается; отдельный flusher переносит накопленное в Postgres пачками,
+    когда БД доступна. Записи удаляются из потока только после коммита в БД,
+    а вставка идемпотентна (ON CONFLICT DO NOTHING), поэтому повторный
+    перенос после сбоя не создаёт дубликатов.
+    """
+
+    client: redis.Redis
+    stream: str = "prices:buffer"
+    lock_timeout_s: float = 60.0
+
+    def append(
+        self,
+        prices: Mapping[str, Decimal],
+        ts: int,
+        anomalies: Sequence[Mapping[str, object]] = (),
+    ) -> str:
+        """
+        Дописывает цены за один timestamp в буфер. Возвращает id записи.
+
+        anomalies — значения, отправленные в карантин проверкой качества
+        ({ticker, price, reason, score}); переносятся в price_anomalies.
+        """
+        fields = {
+            "ts": str(ts),
+            "prices": json.dumps(
+                {ticker: str(price) for ticker, price in prices.items()}
+            ),
+        }
+        if anomalies:
+            fields["anomalies"] = json.dumps(
+                [{**anomaly, "price": str(anomaly["price"])} for anomaly in anomalies]
+            )
+        entry_id = self.client.xadd(self.stream, fields)
+        return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+
+    def pending(self) -> int:
+        """
+        Количество записей (fetch-циклов), ещё не перенесённых в БД.
+        """
+        return int(self.client.xlen(self.stream))
+
+    @property
+    def dead_letter_stream(self) -> str:
+        return f"{self.stream}:dead"
+
+    def dead_letters(self) -> int:
+        """
+        Количество записей, отложенных в dead-letter поток из-за постоянных ошибок.
+        """
+        return int(self.client.xlen(self.dead_letter_stream))
+
+    def flush(
+        self,
+        save_rows: Callable[[list[PriceRow], list[PriceRow]], int],
+        batch_size: int,
+        transient_errors: tuple[type[Exception], ...] = (),
+    ) -> int:
+        """
+        Переносит буфер в БД пачками по batch_size записей.
+
+        save_rows(rows, anomalies) должен сохранить цены и карантин в отдельной
+        транзакции и вернуть число вставленных цен. Ошибка из transient_errors
+        (БД недоступна) прерывает перенос, а необработанные записи остаются
+        в буфере. Любая другая ошибка постоянна: пачка повторяется по одной
+        записи, и записи, которые не удаётся разобрать или сохранить, уходят
+        в dead-letter поток вместе с текстом ошибки, не блокируя остальные.
+        Одновременно работает только один flusher — остальные сразу возвращают 0.
+        Блокировка продлевается перед каждым сохранением; если она уже истекла,
+        перенос останавливается, не мешая flusher'у, который её перехватил.
+
+        Returns:
+            int: количество вставленных строк
+        """
+        lock = self.client.lock(
+            f"{self.stream}:flush-lock", timeout=self.lock_timeout_s
+        )
+        if not lock.acquire(blocking=False):
+            logger.info("Price buffer flush is already running, skipping")
+            return 0
+
+        def renew() -> bool:
+            try:
+                lock.reacquire()
+            except LockNotOwnedError:
+                logger.warning("Price buffer flush lock expired, stopping flush")
+                return False
+            return True
+
+        saved = 0
+        try:
+            while True:
+                entries = self.client.xrange(self.stream, count=batch_size)
+                if not entries:
+                    break
+
+                decoded = []
+                for entry_id, fields in entries:
+                    try:
+                        decoded.append((entry_id, fields, *_decode_entry(fields)))
+                    except Exception as e:
+                        self._dead_letter(entry_id, fields, e)
+
+                if not renew():
+                    break
+                try:
+                    saved += save_rows(
+                        [row for _, _, rows, _ in decoded for row in rows],
+                        [row for _, _, _, anomalies in decoded for row in anomalies],
+                    )
+                except transient_errors:
+                    raise
+                except Exception as e:
+                    logger.warning(
+                        f"Price buffer batch failed ({e!r}), retrying entry by entry"
+                    )
+                    for entry_id, fields, rows, anomalies in decoded:
+                        if not renew():
+                            return saved
+                        try:
+                            saved += save_rows(rows, anomalies)
+                        except transient_errors:
+                            raise
+                        except Exception as entry_error:
+                            self._dead_letter(entry_id, fields, entry_error)
+                        else:
+                            self.client.xdel(self.stream, entry_id)
+                else:
+                    self.client.xdel(
+                        self.stream, *(entry_id for entry_id, *_ in decoded)
+                    )
+
+                if len(entries) < batch_size:
+                    break
+        finally:
+            try:
+                lock.release()
+            except LockNotOwnedError:
+                logger.warning("Price buffer flush lock expired before release")
+        return saved
+
+    def _dead_letter(self, entry_id, fields: Mapping, error: Exception) -> None:
+        """
+        Переносит запись в dead-letter поток (с id и текстом ошибки) и удаляет
+        её из буфера.
+        """
+        self.client.xadd(
+            self.dead_letter_stream,
+            {
+                **{_text(k): _text(v) for k, v in fields.items()},
+                "entry_id": _text(entry_id),
+                "error": repr(error),
+            },
+        )
+        self.client.xdel(self.stream, entry_id)
+        logger.error(
+            f"Price buffer entry {_text(entry_id)} moved to dead letters: {error!r}"
+        )
+
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _field(fields: Mapping, name: str) -> str | None:
+    return _text(fields.get(name, fields.get(name.encode())))
+
+
+def _decode_entry(fields: Mapping) -> tuple[list[PriceRow], list[PriceRow]]:
+    ts = int(_field(fields, "ts"))
+    prices = json.loads(_field(fields, "prices"))
+    rows = [
+        {"ticker": ticker, "price": Decimal(price), "ts": ts}
+        for ticker, price in prices.items()
+    ]
+    anomalies = [
+        {
+            "ticker": anomaly["ticker"],
+            "price": Decimal(anomaly["price"]),
+            "ts": ts,
+            "reason": anomaly["reason"],
+            "score": anomaly.get("score"),
+        }
+        for anomaly in json.loads(_field(fields, "anomalies") or "[]")
+    ]
+    return rows, anomalies
+
+
+@lru_cache(maxsize=1)
+def get_price_buffer() -> PriceBuffer:
+    """
+    Буфер процесса поверх общего Redis-клиента.
+    """
+    return PriceBuffer(client=get_redis(), stream=get_settings().price_buffer_stream)
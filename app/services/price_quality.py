@@ -0,0 +1,270 @@
+"""
+Контроль качества цен при сборе: выбросы и «замёрзшие» значения.
+
+Для каждого тикера хранится небольшое скользящее состояние (EWMA среднего и
+дисперсии лог-доходностей, последние N цен, время последнего изменения цены
+и последнего проверенного значения),
+поэтому проверка одного значения — O(1) и не требует чтения истории из БД.
+Состояние живёт в Redis и общее для всех процессов и узлов worker'а.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import statistics
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from decimal import Decimal
+from functools import lru_cache
+
+import redis
+
+from app.core.config import get_settings
+from app.core.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+OUTLIER = "outlier"
+STALE = "stale"
+# Счётчик значений не новее последнего проверенного (повтор или опоздавший цикл)
+IGNORED = "ignored"
+
+
+@dataclass(frozen=True)
+class QualityConfig:
+    """Пороги проверки качества цен."""
+
+    ewma_alpha: float = 0.05
+    z_threshold: float = 8.0
+    warmup: int = 30
+    window: int = 5
+    stale_after_s: int = 300
+
+
+@dataclass
+class TickerState:
+    """Скользящее состояние тикера для проверки очередного значения."""
+
+    mean: float = 0.0
+    var: float = 0.0
+    count: int = 0
+    last_price: float | None = None
+    last_raw: float | None = None
+    last_changed_ts: int | None = None
+    last_seen_ts: int | None = None
+    recent: list[float] = field(default_factory=list)
+
+    @classmethod
+    def from_mapping(cls, data: Mapping) -> TickerState:
+        """
+        Восстанавливает состояние из Redis hash (пустой hash — новое состояние).
+        """
+        fields = {
+            (k.decode() if isinstance(k, bytes) else k): (
+                v.decode() if isinstance(v, bytes) else v
+            )
+            for k, v in data.items()
+        }
+        if not fields:
+            return cls()
+        return cls(
+            mean=float(fields["mean"]),
+            var=float(fields["var"]),
+            count=int(fields["count"]),
+            last_price=_optional_float(fields.get("last_price")),
+            last_raw=_optional_float(fields.get("last_raw")),
+            last_changed_ts=_optional_int(fields.get("last_changed_ts")),
+            last_seen_ts=_optional_int(fields.get("last_seen_ts")),
+            recent=[float(x) for x in fields.get("recent", "").split(",") if x],
+        )
+
+    def to_mapping(self) -> dict[str, str]:
+        return {
+            "mean": repr(self.mean),
+            "var": repr(self.var),
+            "count": str(self.count),
+            "last_price": "" if self.last_price is None else repr(self.last_price),
+            "last_raw": "" if self.last_raw is None else repr(self.last_raw),
+            "last_changed_ts": (
+                "" if self.last_changed_ts is None else str(self.last_changed_ts)
+            ),
+            "last_seen_ts": (
+                "" if self.last_seen_ts is None else str(self.last_seen_ts)
+            ),
+            "recent": ",".join(repr(x) for x in self.recent),
+        }
+
+
+def _optional_float(value: str | None) -> float | None:
+    return float(value) if value else None
+
+
+def _optional_int(value: str | None) -> int | None:
+    return int(value) if value else None
+
+
+@dataclass(frozen=True)
+class Anomaly:
+    """Значение, не прошедшее проверку качества (уходит в карантин)."""
+
+    ticker: str
+    price: Decimal
+    ts: int
+    reason: str
+    score: float | None
+
+
+def evaluate(
+    state: TickerState, price: float, ts: int, config: QualityConfig
+) -> tuple[str | None, float | None]:
+    """
+    Проверяет одно значение и обновляет состояние тикера на месте.
+
+    - stale: цена не менялась дольше config.stale_after_s;
+    - outlier: лог-доходность к последней принятой цене отклоняется от EWMA
+      больше чем на z_threshold сигм и при этом цена так же далека от медианы
+      последних N значений. Второе условие пропускает устойчивый сдвиг уровня:
+      когда медиана последних значений переходит на новый уровень,
+      они снова принимаются.
+
+    Отклонённые значения не меняют EWMA и последнюю принятую цену.
+
+    Returns:
+        (причина или None, оценка: z-score для outlier, секунды без изменений для stale)
+    """
+    reason: str | None = None
+    score: float | None = None
+
+    if state.last_raw is None or price != state.last_raw:
+        state.last_changed_ts = ts
+    elif ts - state.last_changed_ts >= config.stale_after_s:
+        reason, score = STALE, float(ts - state.last_changed_ts)
+
+    log_return = (
+        math.log(price / state.last_price) if state.last_price is not None else None
+    )
+    if reason is None and log_return is not None and state.count >= config.warmup:
+        std = math.sqrt(state.var)
+        if std > 0:
+            score = abs(log_return - state.mean) / std
+            median = (
+                statistics.median(state.recent) if state.recent else state.last_price
+            )
+            median_score = abs(math.log(price / median)) / std
+            if score > config.z_threshold and median_score > config.z_threshold:
+                reason = OUTLIER
+
+    state.last_raw = price
+    state.last_seen_ts = ts
+    state.recent = (state.recent + [price])[-config.window :]
+
+    if reason is None:
+        if log_return is not None:
+            delta = log_return - state.mean
+            state.mean += config.ewma_alpha * delta
+            state.var = (1 - config.ewma_alpha) * (
+                state.var + config.ewma_alpha * delta * delta
+            )
+            state.count += 1
+        state.last_price = price
+
+    return reason, score
+
+
+@dataclass(frozen=True)
+class PriceValidator:
+    """
+    Этап проверки качества в пайплайне сбора цен.
+
+    Состояние тикеров читается и записывается одной транзакцией WATCH/MULTI:
+    если другой процесс изменил его между чтением и записью, цикл проверки
+    повторяется на свежем состоянии, и обновления не теряются. Ведёт счётчики
+    проверок по тикерам в hash {key_prefix}:metrics:<ticker>.
+    """
+
+    client: redis.Redis
+    config: QualityConfig = QualityConfig()
+    key_prefix: str = "quality"
+
+    def _state_key(self, ticker: str) -> str:
+        return f"{self.key_prefix}:state:{ticker}"
+
+    def _metrics_key(self, ticker: str) -> str:
+        return f"{self.key_prefix}:metrics:{ticker}"
+
+    def validate(
+        self, prices: Mapping[str, Decimal], ts: int
+    ) -> tuple[dict[str, Decimal], list[Anomaly]]:
+        """
+        Делит цены цикла на принятые и аномальные.
+
+        Значения с ts не новее последнего проверенного значения тикера (повтор
+        или опоздавший цикл) пропускаются: не попадают ни в один из списков
+        и не меняют состояние.
+        """
+        tickers = list(prices)
+        if not tickers:
+            return {}, []
+
+        def check(
+            pipe: redis.client.Pipeline,
+        ) -> tuple[dict[str, Decimal], list[Anomaly]]:
+            raw_states = [pipe.hgetall(self._state_key(ticker)) for ticker in tickers]
+            pipe.multi()
+
+            accepted: dict[str, Decimal] = {}
+            anomalies: list[Anomaly] = []
+            for ticker, raw_state in zip(tickers, raw_states):
+                state = TickerState.from_mapping(raw_state or {})
+                if state.last_seen_ts is not None and ts <= state.last_seen_ts:
+                    pipe.hincrby(self._metrics_key(ticker), IGNORED, 1)
+                    continue
+
+                price = prices[ticker]
+                reason, score = evaluate(state, float(price), ts, self.config)
+                pipe.hset(self._state_key(ticker), mapping=state.to_mapping())
+                pipe.hincrby(self._metrics_key(ticker), "checked", 1)
+                if reason is None:
+                    accepted[ticker] = price
+                else:
+                    anomalies.append(Anomaly(ticker, price, ts, reason, score))
+                    pipe.hincrby(self._metrics_key(ticker), reason, 1)
+            return accepted, anomalies
+
+        accepted, anomalies = self.client.transaction(
+            check,
+            *(self._state_key(ticker) for ticker in tickers),
+            value_from_callable=True,
+        )
+
+        for anomaly in anomalies:
+            logger.warning(
+                f"Price quarantined: {anomaly.ticker}={anomaly.price} at {ts} "
+                f"({anomaly.reason}, score={anomaly.score})"
+            )
+        return accepted, anomalies
+
+    def metrics(self, ticker: str) -> dict[str, int]:
+        """
+        Счётчики проверок тикера: checked, outlier, stale, ignored.
+        """
+        raw = self.client.hgetall(self._metrics_key(ticker))
+        return {
+            (k.decode() if isinstance(k, bytes) else k): int(v) for k, v in raw.items()
+        }
+
+
+@lru_cache(maxsize=1)
+def get_price_validator() -> PriceValidator:
+    settings = get_settings()
+    return PriceValidator(
+        client=get_redis(),
+        config=QualityConfig(
+            ewma_alpha=settings.quality_ewma_alpha,
+            z_threshold=settings.quality_z_threshold,
+            warmup=settings.quality_warmup,
+            window=settings.quality_window,
+            stale_after_s=settings.quality_stale_after_s,
+        ),
+    )
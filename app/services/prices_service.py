@@ -4,8 +4,22 @@ from dataclasses import dataclass
 
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
 from app.db import crud
-from app.db.models import Price
+from app.db.models import LatestPrice, Price
+from app.db.query_budget import (
+    apply_statement_timeout,
+    ensure_within_row_limit,
+    row_limit_for_range,
+)
+
+
+@dataclass(frozen=True)
+class PriceList:
+    """Последние цены по тикеру; truncated=True, если старые точки не вошли."""
+
+    items: list[Price]
+    truncated: bool
 
 
 @dataclass(frozen=True)
@@ -14,24 +28,46 @@ class PriceService:
     Сервисный слой для работы с ценами.
 
     Инкапсулирует доступ к данным (CRUD) и позволяет держать роуты тонкими.
+    Точечные запросы укладываются в statement timeout соединения по умолчанию;
+    запросы по диапазонам задают свой бюджет: более длинный timeout и лимит строк.
     """
 
     db: Session
 
-    def get_all(self, ticker: str) -> list[Price]:
+    def get_all(self, ticker: str) -> PriceList:
         """
-        Получает все цены для указанного тикера.
+        Получает цены для указанного тикера (не более settings.max_rows последних).
+        Выбирает на одну строку больше, чтобы отличить полный ответ от усечённого.
         """
-        return crud.get_prices(self.db, ticker)
+        settings = get_settings()
+        apply_statement_timeout(self.db, settings.range_statement_timeout_ms)
+        items = crud.get_prices(self.db, ticker, limit=settings.max_rows + 1)
+        truncated = len(items) > settings.max_rows
+        return PriceList(items=items[1:] if truncated else items, truncated=truncated)
 
-    def get_latest(self, ticker: str) -> Price | None:
+    def get_latest(self, ticker: str) -> LatestPrice | None:
         """
-        Получает последнюю цену для указанного тикера.
+        Получает последнюю цену для указанного тикера (из latest_prices).
         """
         return crud.get_latest_price(self.db, ticker)
 
+    def get_latest_all(self) -> list[LatestPrice]:
+        """
+        Получает последние цены по всем тикерам (из latest_prices).
+        """
+        return crud.get_latest_prices(self.db)
+
     def get_by_date(self, ticker: str, from_ts: int, to_ts: int) -> list[Price]:
         """
         Получает цены для указанного тикера в указанном диапазоне времени.
+        Лимит строк зависит от размера диапазона; диапазон, который в него
+        не помещается, отклоняется RowLimitExceeded, а не усекается.
         """
-        return crud.get_prices_by_date(self.db, ticker, from_ts, to_ts)
+        settings = get_settings()
+        apply_statement_timeout(self.db, settings.range_statement_timeout_ms)
+        limit = row_limit_for_range(from_ts, to_ts, settings.max_rows)
+        items = crud.get_prices_by_date(
+            self.db, ticker, from_ts, to_ts, limit=limit + 1
+        )
+        ensure_within_row_limit(len(items), limit)
+        return items
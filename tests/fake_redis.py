@@ -0,0 +1,173 @@
+"""Минимальная in-memory замена Redis для unit-тестов (только используемые команды)."""
+
+from __future__ import annotations
+
+import itertools
+
+import redis
+
+
+class FakeLock:
+    def __init__(self, store: "FakeRedis", name: str):
+        self._store = store
+        self._name = name
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if self._name in self._store.locks:
+            return False
+        self._store.locks.add(self._name)
+        return True
+
+    def _check_owned(self) -> None:
+        if self._name not in self._store.locks:
+            raise redis.exceptions.LockNotOwnedError("Lock is not owned")
+
+    def reacquire(self) -> bool:
+        self._check_owned()
+        return True
+
+    def release(self) -> None:
+        self._check_owned()
+        self._store.locks.discard(self._name)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.streams: dict[str, list[tuple[bytes, dict[bytes, bytes]]]] = {}
+        self.locks: set[str] = set()
+        self.values: dict[str, bytes] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+        self.versions: dict[str, int] = {}
+        self._ids = itertools.count(1)
+
+    def xadd(self, name: str, fields: dict) -> bytes:
+        entry_id = f"{next(self._ids)}-0".encode()
+        encoded = {str(k).encode(): str(v).encode() for k, v in fields.items()}
+        self.streams.setdefault(name, []).append((entry_id, encoded))
+        return entry_id
+
+    def xrange(self, name: str, count: int | None = None):
+        entries = list(self.streams.get(name, []))
+        return entries if count is None else entries[:count]
+
+    def xdel(self, name: str, *ids: bytes) -> int:
+        before = len(self.streams.get(name, []))
+        self.streams[name] = [e for e in self.streams.get(name, []) if e[0] not in ids]
+        return before - len(self.streams[name])
+
+    def xlen(self, name: str) -> int:
+        return len(self.streams.get(name, []))
+
+    def lock(self, name: str, timeout: float | None = None) -> FakeLock:
+        return FakeLock(self, name)
+
+    def set(self, name: str, value, nx: bool = False, ex: int | None = None):
+        if nx and name in self.values:
+            return None
+        self.values[name] = str(value).encode()
+        return True
+
+    def get(self, name: str):
+        return self.values.get(name)
+
+    def zadd(self, name: str, mapping: dict) -> int:
+        zset = self.zsets.setdefault(name, {})
+        added = sum(1 for member in mapping if member not in zset)
+        zset.update(mapping)
+        return added
+
+    def zrem(self, name: str, *members) -> int:
+        zset = self.zsets.get(name, {})
+        return sum(1 for member in members if zset.pop(member, None) is not None)
+
+    def zremrangebyscore(self, name: str, min, max) -> int:
+        zset = self.zsets.get(name, {})
+        stale = [m for m, score in zset.items() if _in_range(score, min, max)]
+        for member in stale:
+            del zset[member]
+        return len(stale)
+
+    def zrangebyscore(self, name: str, min, max) -> list[bytes]:
+        zset = self.zsets.get(name, {})
+        members = sorted(
+            (score, m) for m, score in zset.items() if _in_range(score, min, max)
+        )
+        return [m.encode() for _, m in members]
+
+    def hgetall(self, name: str) -> dict[bytes, bytes]:
+        return dict(self.hashes.get(name, {}))
+
+    def hset(self, name: str, mapping: dict) -> int:
+        self._touch(name)
+        data = self.hashes.setdefault(name, {})
+        data.update({str(k).encode(): str(v).encode() for k, v in mapping.items()})
+        return len(mapping)
+
+    def hincrby(self, name: str, key: str, amount: int = 1) -> int:
+        self._touch(name)
+        data = self.hashes.setdefault(name, {})
+        value = int(data.get(key.encode(), b"0")) + amount
+        data[key.encode()] = str(value).encode()
+        return value
+
+    def _touch(self, name: str) -> None:
+        self.versions[name] = self.versions.get(name, 0) + 1
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    def transaction(self, func, *watches: str, value_from_callable: bool = False):
+        """WATCH/MULTI/EXEC с повтором при WatchError, как Redis.transaction."""
+        while True:
+            pipe = self.pipeline()
+            pipe.watch(*watches)
+            try:
+                value = func(pipe)
+                result = pipe.execute()
+            except redis.WatchError:
+                continue
+            return value if value_from_callable else result
+
+
+class FakePipeline:
+    """
+    Копит команды и выполняет их по execute(), как redis-py pipeline.
+    После watch() команды выполняются сразу, пока не вызван multi().
+    """
+
+    def __init__(self, store: FakeRedis):
+        self._store = store
+        self._calls = []
+        self._watched: dict[str, int] | None = None
+        self._immediate = False
+
+    def watch(self, *names: str) -> None:
+        self._watched = {name: self._store.versions.get(name, 0) for name in names}
+        self._immediate = True
+
+    def multi(self) -> None:
+        self._immediate = False
+
+    def __getattr__(self, name: str):
+        method = getattr(self._store, name)
+        if self._immediate:
+            return method
+
+        def command(*args, **kwargs):
+            self._calls.append((method, args, kwargs))
+            return self
+
+        return command
+
+    def execute(self) -> list:
+        calls, self._calls = self._calls, []
+        if self._watched is not None:
+            watched, self._watched = self._watched, None
+            if any(self._store.versions.get(n, 0) != v for n, v in watched.items()):
+                raise redis.WatchError("Watched variable changed.")
+        return [method(*args, **kwargs) for method, args, kwargs in calls]
+
+
+def _in_range(score: float, min, max) -> bool:
+    return float(min) <= score <= float(max)
@@ -0,0 +1,121 @@
+import math
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+from app.services import analytics
+from app.services.analytics_service import AnalyticsService
+
+
+class AnalyticsKernelsTests(unittest.TestCase):
+    """Unit-тесты векторизованных вычислений над рядами цен."""
+
+    def test_log_returns(self):
+        """log_returns считает ln(p[i+1]/p[i]) и возвращает n-1 значений."""
+        prices = np.array([100.0, 110.0, 99.0])
+        result = analytics.log_returns(prices)
+        np.testing.assert_allclose(result, [np.log(1.1), np.log(0.9)])
+
+    def test_log_returns_single_point_is_empty(self):
+        """Для одной точки доходностей нет."""
+        self.assertEqual(analytics.log_returns(np.array([1.0])).size, 0)
+
+    def test_rolling_std_matches_naive(self):
+        """rolling_std совпадает с наивным расчётом по окнам."""
+        rng = np.random.default_rng(42)
+        values = rng.normal(0.0, 1e-3, size=500)
+        window = 20
+        expected = np.array(
+            [
+                values[i : i + window].std(ddof=1)
+                for i in range(values.size - window + 1)
+            ]
+        )
+        np.testing.assert_allclose(
+            analytics.rolling_std(values, window), expected, rtol=1e-6, atol=1e-12
+        )
+
+    def test_rolling_std_short_input_is_empty(self):
+        """Если точек меньше окна, результат пустой."""
+        self.assertEqual(analytics.rolling_std(np.array([1.0, 2.0]), 3).size, 0)
+
+    def test_rolling_std_rejects_small_window(self):
+        """Окно меньше 2 не имеет смысла для выборочного std."""
+        with self.assertRaises(ValueError):
+            analytics.rolling_std(np.array([1.0, 2.0, 3.0]), 1)
+
+    def test_correlation_aligns_on_common_ts(self):
+        """Корреляция считается только по общим timestamp'ам."""
+        ts_a = np.array([0, 60, 120, 180, 240])
+        prices_a = np.array([100.0, 101.0, 99.0, 102.0, 103.0])
+        # Лишняя точка ts=30 не должна влиять на результат
+        ts_b = np.array([0, 30, 60, 120, 180, 240])
+        prices_b = np.array([50.0, 1.0, 50.5, 49.5, 51.0, 51.5])
+
+        value, count = analytics.returns_correlation(ts_a, prices_a, ts_b, prices_b)
+        self.assertEqual(count, 4)
+        self.assertAlmostEqual(value, 1.0, places=3)
+
+    def test_correlation_constant_series_is_none(self):
+        """Для постоянного ряда корреляция не определена."""
+        ts = np.array([0, 60, 120])
+        value, count = analytics.returns_correlation(
+            ts, np.array([1.0, 1.0, 1.0]), ts, np.array([1.0, 2.0, 3.0])
+        )
+        self.assertEqual(count, 2)
+        self.assertIsNone(value)
+
+
+class AnalyticsServiceStatsTests(unittest.TestCase):
+    """get_stats собирает сводку из одной агрегатной строки БД."""
+
+    def _stats(self, row):
+        with patch(
+            "app.services.analytics_service.crud.get_price_stats", return_value=row
+        ) as get_price_stats:
+            stats = AnalyticsService(Mock()).get_stats("btc_usd", 0, 240)
+        get_price_stats.assert_called_once()
+        return stats
+
+    def test_builds_stats_from_aggregates(self):
+        """log_return считается по first/last, остальное берётся из строки."""
+        row = SimpleNamespace(
+            count=4,
+            first=100.0,
+            last=110.0,
+            min=95.0,
+            max=110.0,
+            mean=102.5,
+            twap=101.25,
+            volatility=0.08,
+        )
+        stats = self._stats(row)
+
+        self.assertEqual(stats.count, 4)
+        self.assertEqual(stats.twap, 101.25)
+        self.assertAlmostEqual(stats.log_return, math.log(1.1))
+        self.assertEqual(stats.volatility, 0.08)
+
+    def test_single_point_twap_is_its_price(self):
+        """Для одной точки TWAP равен её цене, волатильности нет."""
+        row = SimpleNamespace(
+            count=1,
+            first=100.0,
+            last=100.0,
+            min=100.0,
+            max=100.0,
+            mean=100.0,
+            twap=None,
+            volatility=None,
+        )
+        stats = self._stats(row)
+
+        self.assertEqual(stats.twap, 100.0)
+        self.assertEqual(stats.log_return, 0.0)
+        self.assertIsNone(stats.volatility)
+
+    def test_no_data_returns_none(self):
+        """Пустой диапазон — None."""
+        self.assertIsNone(self._stats(None))
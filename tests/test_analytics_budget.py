@@ -0,0 +1,93 @@
+import inspect
+import time
+import unittest
+
+import httpx
+import numpy as np
+
+from app.db.deps import get_db
+from app.main import app
+
+# Год минутных данных по одному тикеру
+YEAR_OF_MINUTES = 365 * 24 * 60
+FROM_TS = 1_700_000_000
+TO_TS = FROM_TS + (YEAR_OF_MINUTES - 1) * 60
+
+# Бюджет на обработку года данных после ответа БД (секунды): разбор ответа
+# драйвером, загрузка колонок в NumPy, вычисления и сериализация ответа.
+# Время БД и сети сюда не входит. Берётся лучшее из нескольких измерений,
+# чтобы фоновая нагрузка на CI не давала ложных падений.
+SERIES_BUDGET_S = 0.5
+TIMED_RUNS = 3
+
+
+class _BinaryAggSession:
+    """
+    Заглушка Session: отдаёт год цен так же, как PostgreSQL отдаёт результат
+    crud.get_price_arrays — одной строкой из двух bytea. bytea приходит
+    в текстовом протоколе в hex, поэтому его разбор драйвером (libpq)
+    воспроизводится через bytes.fromhex при каждом запросе.
+    """
+
+    def __init__(self):
+        rng = np.random.default_rng(7)
+        prices = 30_000 * np.exp(np.cumsum(rng.normal(0, 1e-3, YEAR_OF_MINUTES)))
+        ts = FROM_TS + 60 * np.arange(YEAR_OF_MINUTES)
+        self._wire = (
+            ts.astype(">i8").tobytes().hex(),
+            prices.astype(">f8").tobytes().hex(),
+        )
+
+    def execute(self, *_args, **_kwargs):
+        return self
+
+    def one(self):
+        return tuple(bytes.fromhex(column) for column in self._wire)
+
+
+class AnalyticsBudgetTests(unittest.IsolatedAsyncioTestCase):
+    """Ряды за год минутных данных укладываются в бюджет (без времени БД)."""
+
+    async def asyncSetUp(self):
+        self._prev_overrides = dict(app.dependency_overrides)
+        session = _BinaryAggSession()
+        app.dependency_overrides[get_db] = lambda: session
+
+        transport_kwargs = {"app": app}
+        if "lifespan" in inspect.signature(httpx.ASGITransport.__init__).parameters:
+            transport_kwargs["lifespan"] = "on"
+
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(**transport_kwargs),
+            base_url="http://test",
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        app.dependency_overrides = self._prev_overrides
+
+    async def _timed_get(self, path: str, **params) -> tuple[httpx.Response, float]:
+        params = {"ticker": "btc_usd", "from_ts": FROM_TS, "to_ts": TO_TS, **params}
+        await self.client.get(path, params=params)  # прогрев
+        best = float("inf")
+        for _ in range(TIMED_RUNS):
+            started = time.perf_counter()
+            r = await self.client.get(path, params=params)
+            best = min(best, time.perf_counter() - started)
+        return r, best
+
+    async def test_returns_for_a_year_within_budget(self):
+        """GET /prices/returns за год минутных данных (ряд на ~525k точек)."""
+        r, elapsed = await self._timed_get("/prices/returns")
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.json()["values"]), YEAR_OF_MINUTES - 1)
+        self.assertLess(elapsed, SERIES_BUDGET_S)
+
+    async def test_volatility_for_a_year_within_budget(self):
+        """GET /prices/volatility за год минутных данных (ряд на ~525k точек)."""
+        r, elapsed = await self._timed_get("/prices/volatility", window=60)
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.json()["values"]), YEAR_OF_MINUTES - 60)
+        self.assertLess(elapsed, SERIES_BUDGET_S)
@@ -5,9 +5,14 @@ from unittest.mock import patch
 
 import httpx
 import inspect
+import numpy as np
 
 from app.main import app
 from app.db.deps import get_db
+from app.db.query_budget import RowLimitExceeded
+from app.services.analytics import PriceStats
+from app.services.analytics_service import Correlation, Series
+from app.services.prices_service import PriceList
 
 
 def _override_get_db():
@@ -106,14 +111,17 @@ class ApiTests(unittest.IsolatedAsyncioTestCase):
 
     @patch(
         "app.api.routes.PriceService.get_all",
-        return_value=[
-            SimpleNamespace(
-                ticker="btc_usd", price=Decimal("42000.12345678"), ts=1700000000
-            ),
-            SimpleNamespace(
-                ticker="btc_usd", price=Decimal("42010.00000000"), ts=1700000060
-            ),
-        ],
+        return_value=PriceList(
+            items=[
+                SimpleNamespace(
+                    ticker="btc_usd", price=Decimal("42000.12345678"), ts=1700000000
+                ),
+                SimpleNamespace(
+                    ticker="btc_usd", price=Decimal("42010.00000000"), ts=1700000060
+                ),
+            ],
+            truncated=False,
+        ),
     )
     async def test_prices_returns_list(self, _mock_get_all):
         """GET /prices возвращает список цен по тикеру (happy path)."""
@@ -128,8 +136,31 @@ class ApiTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(data[0]["ticker"], "btc_usd")
         self.assertEqual(data[0]["ts"], 1700000000)
         self.assertIn("price", data[0])
+        self.assertNotIn("X-Result-Truncated", r.headers)
 
-    @patch("app.api.routes.PriceService.get_all", return_value=[])
+    @patch(
+        "app.api.routes.PriceService.get_all",
+        return_value=PriceList(
+            items=[
+                SimpleNamespace(
+                    ticker="btc_usd", price=Decimal("42010.00000000"), ts=1700000060
+                ),
+            ],
+            truncated=True,
+        ),
+    )
+    async def test_prices_marks_truncated_response(self, _mock_get_all):
+        """GET /prices сообщает заголовком, что вошли только последние точки."""
+        r = await self.client.get("/prices", params={"ticker": "btc_usd"})
+        self.assertEqual(r.status_code, 200)
+
+        self.assertEqual(r.headers["X-Result-Truncated"], "true")
+        self.assertEqual(len(r.json()), 1)
+
+    @patch(
+        "app.api.routes.PriceService.get_all",
+        return_value=PriceList(items=[], truncated=False),
+    )
     async def test_prices_returns_empty_list_when_no_rows(self, _mock_get_all):
         """GET /prices возвращает пустой список, если данных нет."""
         r = await self.client.get("/prices", params={"ticker": "btc_usd"})
@@ -165,3 +196,148 @@ class ApiTests(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(data["ticker"], "btc_usd")
         self.assertEqual(data["ts"], 1700000000)
         self.assertIn("price", data)
+
+    @patch(
+        "app.api.routes.PriceService.get_by_date",
+        side_effect=RowLimitExceeded(100),
+    )
+    async def test_by_date_returns_413_when_range_exceeds_row_limit(self, _mock):
+        """GET /prices/by-date отклоняет диапазон больше лимита строк, не усекая его."""
+        r = await self.client.get(
+            "/prices/by-date",
+            params={"ticker": "btc_usd", "from_ts": 0, "to_ts": 10**9},
+        )
+        self.assertEqual(r.status_code, 413)
+        self.assertIn("100 rows", r.json()["detail"])
+
+    @patch(
+        "app.api.routes.AnalyticsService.get_volatility",
+        side_effect=RowLimitExceeded(100),
+    )
+    async def test_volatility_returns_413_when_rows_exceed_limit(self, _mock):
+        """GET /prices/volatility отклоняет диапазон, строк в котором больше лимита."""
+        r = await self.client.get(
+            "/prices/volatility",
+            params={"ticker": "btc_usd", "from_ts": 0, "to_ts": 10**9},
+        )
+        self.assertEqual(r.status_code, 413)
+
+    async def test_stats_validation_from_gt_to_returns_400(self):
+        """GET /prices/stats возвращает 400 при from_ts > to_ts."""
+        r = await self.client.get(
+            "/prices/stats",
+            params={"ticker": "btc_usd", "from_ts": 10, "to_ts": 1},
+        )
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.json()["detail"], "from_ts must be <= to_ts")
+
+    @patch("app.api.routes.AnalyticsService.get_stats", return_value=None)
+    async def test_stats_returns_404_when_no_data(self, _mock_get_stats):
+        """GET /prices/stats возвращает 404, если в диапазоне нет данных."""
+        r = await self.client.get(
+            "/prices/stats",
+            params={"ticker": "btc_usd", "from_ts": 0, "to_ts": 1},
+        )
+        self.assertEqual(r.status_code, 404)
+        _mock_get_stats.assert_called_once_with("btc_usd", 0, 1)
+
+    @patch(
+        "app.api.routes.AnalyticsService.get_stats",
+        return_value=PriceStats(
+            count=2,
+            first=100.0,
+            last=110.0,
+            min=100.0,
+            max=110.0,
+            mean=105.0,
+            twap=100.0,
+            log_return=0.0953,
+            volatility=None,
+        ),
+    )
+    async def test_stats_returns_200_when_data_exists(self, _mock_get_stats):
+        """GET /prices/stats возвращает сводку с исходным диапазоном."""
+        r = await self.client.get(
+            "/prices/stats",
+            params={"ticker": "btc_usd", "from_ts": 0, "to_ts": 60},
+        )
+        self.assertEqual(r.status_code, 200)
+
+        data = r.json()
+        self.assertEqual(data["ticker"], "btc_usd")
+        self.assertEqual(data["from_ts"], 0)
+        self.assertEqual(data["to_ts"], 60)
+        self.assertEqual(data["count"], 2)
+        self.assertIsNone(data["volatility"])
+
+    @patch(
+        "app.api.routes.AnalyticsService.get_volatility",
+        return_value=Series(ts=np.array([120]), values=np.array([0.01])),
+    )
+    async def test_volatility_passes_window(self, _mock_get_volatility):
+        """GET /prices/volatility передаёт размер окна в сервис."""
+        r = await self.client.get(
+            "/prices/volatility",
+            params={"ticker": "eth_usd", "from_ts": 0, "to_ts": 120, "window": 5},
+        )
+        self.assertEqual(r.status_code, 200)
+
+        _mock_get_volatility.assert_called_once_with("eth_usd", 0, 120, 5)
+        self.assertEqual(
+            r.json(),
+            {
+                "ticker": "eth_usd",
+                "from_ts": 0,
+                "to_ts": 120,
+                "ts": [120],
+                "values": [0.01],
+            },
+        )
+
+    async def test_volatility_window_too_small_returns_422(self):
+        """GET /prices/volatility с window < 2 возвращает 422."""
+        r = await self.client.get(
+            "/prices/volatility",
+            params={"ticker": "eth_usd", "from_ts": 0, "to_ts": 120, "window": 1},
+        )
+        self.assertEqual(r.status_code, 422)
+
+    @patch(
+        "app.api.routes.AnalyticsService.get_correlation",
+        return_value=Correlation(
+            ticker="btc_usd", other="eth_usd", count=10, correlation=0.8
+        ),
+    )
+    async def test_correlation_returns_200(self, _mock_get_correlation):
+        """GET /prices/correlation возвращает корреляцию двух тикеров."""
+        r = await self.client.get(
+            "/prices/correlation",
+            params={
+                "ticker": "btc_usd",
+                "other": "eth_usd",
+                "from_ts": 0,
+                "to_ts": 600,
+            },
+        )
+        self.assertEqual(r.status_code, 200)
+
+        _mock_get_correlation.assert_called_once_with("btc_usd", "eth_usd", 0, 600)
+        data = r.json()
+        self.assertEqual(data["correlation"], 0.8)
+        self.assertEqual(data["count"], 10)
+
+    @patch(
+        "app.api.routes.PriceService.get_latest_all",
+        return_value=[
+            SimpleNamespace(ticker="btc_usd", price=Decimal("42000.1"), ts=1700000000),
+            SimpleNamespace(ticker="eth_usd", price=Decimal("2500.2"), ts=1700000000),
+        ],
+    )
+    async def test_latest_all_returns_list(self, _mock_get_latest_all):
+        """GET /prices/latest/all возвращает последние цены по всем тикерам."""
+        r = await self.client.get("/prices/latest/all")
+        self.assertEqual(r.status_code, 200)
+
+        _mock_get_latest_all.assert_called_once_with()
+        data = r.json()
+        self.assertEqual([item["ticker"] for item in data], ["btc_usd", "eth_usd"])
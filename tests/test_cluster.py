@@ -0,0 +1,155 @@
+import unittest
+from unittest.mock import patch
+
+from app.services.cluster import HashRing, NodeRegistry, SlotLeader, node_queue
+from tests.fake_redis import FakeRedis
+from worker import celery_app, tasks
+from worker.schedule import SCHEDULED_TS_HEADER
+
+TICKERS = tuple(f"ticker_{i}" for i in range(300))
+
+
+class HashRingTests(unittest.TestCase):
+    """Unit-тесты консистентного хеширования тикеров по узлам."""
+
+    def test_assign_covers_all_keys_once(self):
+        """Каждый тикер назначен ровно одному узлу."""
+        assignment = HashRing(("a", "b", "c")).assign(TICKERS)
+
+        assigned = [t for tickers in assignment.values() for t in tickers]
+        self.assertEqual(sorted(assigned), sorted(TICKERS))
+
+    def test_assign_is_reasonably_balanced(self):
+        """Шарды узлов сопоставимы по размеру."""
+        assignment = HashRing(("a", "b", "c")).assign(TICKERS)
+
+        sizes = [len(tickers) for tickers in assignment.values()]
+        self.assertEqual(len(sizes), 3)
+        self.assertGreater(min(sizes), len(TICKERS) / 3 * 0.5)
+
+    def test_node_join_moves_only_part_of_keys(self):
+        """При добавлении узла переезжают только тикеры, доставшиеся новому узлу."""
+        before = HashRing(("a", "b", "c"))
+        after = HashRing(("a", "b", "c", "d"))
+
+        moved = [t for t in TICKERS if before.node_for(t) != after.node_for(t)]
+        self.assertTrue(all(after.node_for(t) == "d" for t in moved))
+        self.assertLess(len(moved), len(TICKERS) / 2)
+
+    def test_empty_ring_raises(self):
+        """Без узлов назначать тикеры некуда."""
+        with self.assertRaises(ValueError):
+            HashRing(()).node_for("btc_usd")
+
+
+class RegistryAndLeaderTests(unittest.TestCase):
+    """Реестр узлов и выбор лидера слота поверх общего in-memory Redis."""
+
+    def setUp(self):
+        self.redis = FakeRedis()
+
+    def test_live_nodes_drops_expired(self):
+        """Узел без свежего heartbeat выпадает из реестра."""
+        registry = NodeRegistry(client=self.redis, ttl_s=30)
+        registry.heartbeat("worker1@host", now=100)
+        registry.heartbeat("worker2@host", now=80)
+
+        self.assertEqual(registry.live_nodes(now=115), ("worker1@host",))
+
+    def test_leave_removes_node(self):
+        """Остановленный узел удаляется из реестра сразу."""
+        registry = NodeRegistry(client=self.redis, ttl_s=30)
+        registry.heartbeat("worker1@host", now=100)
+        registry.leave("worker1@host")
+
+        self.assertEqual(registry.live_nodes(now=100), ())
+
+    def test_only_one_scheduler_leads_a_slot(self):
+        """Слот захватывает только первый из нескольких планировщиков."""
+        leader = SlotLeader(client=self.redis)
+
+        self.assertTrue(leader.try_lead(42, "beat-1"))
+        self.assertFalse(leader.try_lead(42, "beat-2"))
+        self.assertTrue(leader.try_lead(43, "beat-2"))
+        self.assertEqual(leader.leader_of(42), "beat-1")
+
+
+class DispatchTests(unittest.TestCase):
+    """dispatch_price_fetch: шардирование по живым узлам и дедупликация слотов."""
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.registry = NodeRegistry(client=self.redis, ttl_s=30)
+        patches = [
+            patch("worker.tasks.get_node_registry", return_value=self.registry),
+            patch(
+                "worker.tasks.get_slot_leader",
+                return_value=SlotLeader(client=self.redis),
+            ),
+            patch("worker.tasks.time.time", return_value=1_700_000_030),
+            patch.object(tasks.fetch_and_store_prices, "apply_async"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.apply_async = tasks.fetch_and_store_prices.apply_async
+
+    def test_dispatches_shards_to_node_queues_once_per_slot(self):
+        """Шарды уходят в очереди узлов; повторный вызов в слоте ничего не делает."""
+        for node in ("worker1@host", "worker2@host"):
+            self.registry.heartbeat(node)
+
+        first = tasks.dispatch_price_fetch()
+        second = tasks.dispatch_price_fetch()
+
+        self.assertTrue(first["dispatched"])
+        self.assertFalse(second["dispatched"])
+
+        dispatched = {}
+        for call in self.apply_async.call_args_list:
+            self.assertEqual(call.kwargs["kwargs"]["ts"], 1_700_000_030 // 60 * 60)
+            dispatched[call.kwargs["queue"]] = call.kwargs["kwargs"]["tickers"]
+
+        expected = HashRing(("worker1@host", "worker2@host")).assign(
+            tasks.get_settings().tickers
+        )
+        self.assertEqual(
+            dispatched,
+            {node_queue(node): list(tickers) for node, tickers in expected.items()},
+        )
+
+    def test_falls_back_to_default_queue_without_nodes(self):
+        """Без зарегистрированных узлов все тикеры уходят в общую очередь."""
+        tasks.dispatch_price_fetch()
+
+        self.apply_async.assert_called_once()
+        self.assertNotIn("queue", self.apply_async.call_args.kwargs)
+
+    def test_late_run_uses_scheduled_slot(self):
+        """Слот берётся из времени срабатывания beat, а не из времени выполнения."""
+        scheduled_ts = 1_700_000_030 - 75
+        tasks.dispatch_price_fetch.push_request(
+            hostname="beat@host", scheduled_ts=scheduled_ts
+        )
+        try:
+            result = tasks.dispatch_price_fetch.run()
+        finally:
+            tasks.dispatch_price_fetch.pop_request()
+
+        self.assertEqual(result["slot"], scheduled_ts // 60)
+        self.assertEqual(
+            self.apply_async.call_args.kwargs["kwargs"]["ts"], scheduled_ts // 60 * 60
+        )
+
+    def test_publish_marks_dispatch_with_scheduled_ts(self):
+        """Сообщения dispatch_price_fetch получают время публикации в заголовке."""
+        dispatch_headers, other_headers = {}, {}
+        celery_app._on_before_task_publish(
+            sender="worker.tasks.dispatch_price_fetch", headers=dispatch_headers
+        )
+        celery_app._on_before_task_publish(
+            sender="worker.tasks.flush_price_buffer", headers=other_headers
+        )
+
+        self.assertIn(SCHEDULED_TS_HEADER, dispatch_headers)
+        self.assertEqual(other_headers, {})
@@ -0,0 +1,133 @@
+import math
+import statistics
+import unittest
+from decimal import Decimal
+from unittest.mock import Mock
+
+import numpy as np
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.db import crud
+from app.db.models import Price
+
+
+class UpsertLatestPricesTests(unittest.TestCase):
+    """Unit-тесты upsert'а latest_prices (проверяем SQL без реальной БД)."""
+
+    def _compile(self, session: Mock):
+        stmt = session.execute.call_args.args[0]
+        return stmt.compile(dialect=postgresql.dialect())
+
+    def test_keeps_only_newest_row_per_ticker(self):
+        """Из пачки в upsert попадает только самая свежая строка каждого тикера."""
+        session = Mock()
+        crud.upsert_latest_prices(
+            session,
+            [
+                {"ticker": "btc_usd", "price": Decimal("1"), "ts": 60},
+                {"ticker": "btc_usd", "price": Decimal("3"), "ts": 180},
+                {"ticker": "eth_usd", "price": Decimal("2"), "ts": 60},
+                {"ticker": "btc_usd", "price": Decimal("2"), "ts": 120},
+            ],
+        )
+
+        compiled = self._compile(session)
+        self.assertIn("ON CONFLICT (ticker) DO UPDATE", str(compiled))
+        self.assertIn("WHERE excluded.ts > latest_prices.ts", str(compiled))
+        values = sorted(
+            (v for k, v in compiled.params.items() if k.startswith("ts")),
+        )
+        self.assertEqual(values, [60, 180])
+        self.assertIn(Decimal("3"), compiled.params.values())
+
+    def test_empty_rows_do_nothing(self):
+        """Пустая пачка не выполняет запрос."""
+        session = Mock()
+        crud.upsert_latest_prices(session, [])
+        session.execute.assert_not_called()
+
+    def test_save_price_rows_updates_latest_in_same_session(self):
+        """save_price_rows пишет prices и latest_prices в одной сессии (транзакции)."""
+        session = Mock()
+        session.execute.return_value.rowcount = 1
+        crud.save_price_rows(
+            session, [{"ticker": "btc_usd", "price": Decimal("1"), "ts": 60}]
+        )
+
+        tables = [call.args[0].table.name for call in session.execute.call_args_list]
+        self.assertEqual(tables, ["prices", "latest_prices"])
+
+
+def _ln(value):
+    return None if value is None else math.log(value)
+
+
+class _StddevSamp:
+    """Агрегат stddev_samp для SQLite (в PostgreSQL он встроенный)."""
+
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        return statistics.stdev(self.values) if len(self.values) >= 2 else None
+
+
+class PriceStatsTests(unittest.TestCase):
+    """get_price_stats: агрегаты ряда в SQL сверяются с расчётом в NumPy."""
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+
+        @event.listens_for(engine, "connect")
+        def _register_functions(dbapi_connection, _record):
+            dbapi_connection.create_function("ln", 1, _ln)
+            dbapi_connection.create_aggregate("stddev_samp", 1, _StddevSamp)
+
+        Price.__table__.create(engine)
+        self.db = Session(engine)
+        self.addCleanup(self.db.close)
+
+    def _insert(self, ticker: str, ts: list[int], prices: list[float]) -> None:
+        self.db.execute(
+            insert(Price),
+            [{"ticker": ticker, "ts": t, "price": p} for t, p in zip(ts, prices)],
+        )
+
+    def test_stats_match_numpy(self):
+        """count/first/last/min/max/mean/twap/volatility совпадают с NumPy."""
+        ts = [0, 60, 180, 240]
+        prices = [100.0, 105.0, 95.0, 110.0]
+        self._insert("btc_usd", ts, prices)
+        self._insert("eth_usd", [120], [1.0])
+
+        row = crud.get_price_stats(self.db, "btc_usd", 0, 240)
+
+        self.assertEqual(row.count, 4)
+        self.assertEqual((row.first, row.last), (100.0, 110.0))
+        self.assertEqual((row.min, row.max), (95.0, 110.0))
+        self.assertAlmostEqual(row.mean, 102.5)
+        self.assertAlmostEqual(row.twap, (100 * 60 + 105 * 120 + 95 * 60) / 240)
+        self.assertAlmostEqual(
+            row.volatility, np.diff(np.log(prices)).std(ddof=1), places=12
+        )
+
+    def test_single_point_has_no_twap_or_volatility(self):
+        """У единственной точки нет длительности и доходностей."""
+        self._insert("btc_usd", [60], [100.0])
+
+        row = crud.get_price_stats(self.db, "btc_usd", 0, 120)
+
+        self.assertEqual((row.count, row.first, row.last), (1, 100.0, 100.0))
+        self.assertIsNone(row.twap)
+        self.assertIsNone(row.volatility)
+
+    def test_empty_range_returns_none(self):
+        """Пустой диапазон — None."""
+        self._insert("btc_usd", [60], [100.0])
+        self.assertIsNone(crud.get_price_stats(self.db, "btc_usd", 120, 180))
@@ -0,0 +1,211 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.services.price_buffer import PriceBuffer
+from tests.fake_redis import FakeRedis
+from worker import tasks
+
+
+class PriceBufferTests(unittest.TestCase):
+    """Unit-тесты write-ahead буфера цен поверх in-memory Redis."""
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.buffer = PriceBuffer(client=self.redis, stream="test:prices")
+
+    def _append_cycles(self, count: int) -> None:
+        for i in range(count):
+            self.buffer.append(
+                {"btc_usd": Decimal("42000.5"), "eth_usd": Decimal("2500.25")}, 60 * i
+            )
+
+    def test_flush_moves_rows_in_batches_and_empties_buffer(self):
+        """flush переносит все записи пачками и очищает буфер."""
+        self._append_cycles(5)
+        batches = []
+
+        def save_rows(rows, anomalies):
+            batches.append(rows)
+            self.assertEqual(anomalies, [])
+            return len(rows)
+
+        saved = self.buffer.flush(save_rows, batch_size=2)
+
+        self.assertEqual(saved, 10)
+        self.assertEqual([len(b) for b in batches], [4, 4, 2])
+        self.assertEqual(
+            batches[0][0], {"ticker": "btc_usd", "price": Decimal("42000.5"), "ts": 0}
+        )
+        self.assertEqual(self.buffer.pending(), 0)
+
+    def test_flush_keeps_entries_when_save_fails(self):
+        """Если БД недоступна, записи остаются в буфере до следующего переноса."""
+        self._append_cycles(3)
+
+        def failing_save(_rows, _anomalies):
+            raise ConnectionError("db is down")
+
+        with self.assertRaises(ConnectionError):
+            self.buffer.flush(
+                failing_save, batch_size=10, transient_errors=(ConnectionError,)
+            )
+
+        self.assertEqual(self.buffer.pending(), 3)
+        self.assertFalse(self.redis.locks)
+
+        saved = self.buffer.flush(lambda rows, _anomalies: len(rows), batch_size=10)
+        self.assertEqual(saved, 6)
+        self.assertEqual(self.buffer.pending(), 0)
+
+    def test_flush_skips_when_another_flusher_holds_lock(self):
+        """Параллельный flusher не обрабатывает буфер повторно."""
+        self._append_cycles(1)
+        self.redis.locks.add("test:prices:flush-lock")
+
+        saved = self.buffer.flush(lambda rows, _anomalies: len(rows), batch_size=10)
+
+        self.assertEqual(saved, 0)
+        self.assertEqual(self.buffer.pending(), 1)
+
+    def test_flush_stops_when_lock_expires_during_save(self):
+        """Истёкшая блокировка останавливает перенос перед следующей пачкой."""
+        self._append_cycles(5)
+
+        def slow_save(rows, _anomalies):
+            self.redis.locks.discard("test:prices:flush-lock")
+            return len(rows)
+
+        with self.assertLogs("app.services.price_buffer", level="WARNING"):
+            saved = self.buffer.flush(slow_save, batch_size=2)
+
+        self.assertEqual(saved, 4)
+        self.assertEqual(self.buffer.pending(), 3)
+
+    def test_flush_tolerates_lock_expired_before_release(self):
+        """Истёкшая к концу переноса блокировка не превращается в ошибку."""
+        self._append_cycles(1)
+
+        def slow_save(rows, _anomalies):
+            self.redis.locks.discard("test:prices:flush-lock")
+            return len(rows)
+
+        saved = self.buffer.flush(slow_save, batch_size=10)
+
+        self.assertEqual(saved, 2)
+        self.assertEqual(self.buffer.pending(), 0)
+
+    def test_flush_dead_letters_entries_failing_permanently(self):
+        """Постоянная ошибка одной записи не блокирует перенос остальных."""
+        self._append_cycles(4)
+        saved_ts = []
+
+        def save_rows(rows, _anomalies):
+            if any(row["ts"] == 60 for row in rows):
+                raise ValueError("numeric field overflow")
+            saved_ts.extend(row["ts"] for row in rows)
+            return len(rows)
+
+        with self.assertLogs("app.services.price_buffer", level="ERROR"):
+            saved = self.buffer.flush(
+                save_rows, batch_size=10, transient_errors=(ConnectionError,)
+            )
+
+        self.assertEqual(saved, 6)
+        self.assertEqual(sorted(set(saved_ts)), [0, 120, 180])
+        self.assertEqual(self.buffer.pending(), 0)
+        self.assertEqual(self.buffer.dead_letters(), 1)
+        _, fields = self.redis.xrange("test:prices:dead")[0]
+        self.assertEqual(fields[b"ts"], b"60")
+        self.assertIn(b"numeric field overflow", fields[b"error"])
+
+    def test_flush_dead_letters_malformed_entries(self):
+        """Запись, которую нельзя разобрать, уходит в dead letters."""
+        self.redis.xadd("test:prices", {"ts": "oops", "prices": "{}"})
+        self._append_cycles(1)
+
+        with self.assertLogs("app.services.price_buffer", level="ERROR"):
+            saved = self.buffer.flush(lambda rows, _anomalies: len(rows), 10)
+
+        self.assertEqual(saved, 2)
+        self.assertEqual(self.buffer.pending(), 0)
+        self.assertEqual(self.buffer.dead_letters(), 1)
+
+    def test_flush_passes_quarantined_rows(self):
+        """Аномалии из буфера передаются во flush вместе с timestamp записи."""
+        self.buffer.append(
+            {"eth_usd": Decimal("2500")},
+            120,
+            anomalies=[
+                {
+                    "ticker": "btc_usd",
+                    "price": Decimal("1"),
+                    "reason": "outlier",
+                    "score": 42.0,
+                }
+            ],
+        )
+        received = []
+
+        def save_rows(rows, anomalies):
+            received.extend(anomalies)
+            return len(rows)
+
+        saved = self.buffer.flush(save_rows, batch_size=10)
+
+        self.assertEqual(saved, 1)
+        self.assertEqual(
+            received,
+            [
+                {
+                    "ticker": "btc_usd",
+                    "price": Decimal("1"),
+                    "ts": 120,
+                    "reason": "outlier",
+                    "score": 42.0,
+                }
+            ],
+        )
+
+
+class FlushTaskTests(unittest.TestCase):
+    """flush_price_buffer: временные ошибки БД против постоянных."""
+
+    def setUp(self):
+        self.buffer = PriceBuffer(client=FakeRedis(), stream="test:prices")
+        for ts in (0, 60):
+            self.buffer.append({"btc_usd": Decimal("42000.5")}, ts)
+        p = patch("worker.tasks.get_price_buffer", return_value=self.buffer)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _flush_with(self, save_rows):
+        with patch("worker.tasks._save_rows", side_effect=save_rows):
+            return tasks.flush_price_buffer()
+
+    def test_database_unavailable_keeps_entries(self):
+        """OperationalError — БД недоступна: записи остаются в буфере."""
+
+        def save_rows(_rows, _anomalies):
+            raise OperationalError("INSERT", {}, Exception("connection refused"))
+
+        with self.assertLogs("worker.tasks", level="WARNING"):
+            result = self._flush_with(save_rows)
+
+        self.assertEqual(result, {"saved_count": 0, "pending": 2})
+        self.assertEqual(self.buffer.dead_letters(), 0)
+
+    def test_integrity_error_does_not_block_the_stream(self):
+        """IntegrityError уводит запись в dead letters, остальные сохраняются."""
+
+        def save_rows(rows, _anomalies):
+            if any(row["ts"] == 0 for row in rows):
+                raise IntegrityError("INSERT", {}, Exception("check_valid_ticker"))
+            return len(rows)
+
+        with self.assertLogs("app.services.price_buffer", level="ERROR"):
+            result = self._flush_with(save_rows)
+
+        self.assertEqual(result, {"saved_count": 1, "pending": 0, "dead_letters": 1})
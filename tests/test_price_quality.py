@@ -0,0 +1,187 @@
+import math
+import unittest
+from decimal import Decimal
+
+from app.services.price_quality import (
+    IGNORED,
+    OUTLIER,
+    STALE,
+    PriceValidator,
+    QualityConfig,
+    TickerState,
+    evaluate,
+)
+from tests.fake_redis import FakeRedis
+
+CONFIG = QualityConfig(
+    ewma_alpha=0.1, z_threshold=6.0, warmup=10, window=5, stale_after_s=300
+)
+
+
+def _warm_state(prices_count: int = 50) -> tuple[TickerState, int]:
+    """Состояние после серии небольших колебаний цены около 100."""
+    state = TickerState()
+    ts = 0
+    for i in range(prices_count):
+        price = 100.0 * (1 + 0.001 * math.sin(i))
+        reason, _ = evaluate(state, price, ts, CONFIG)
+        assert reason is None
+        ts += 60
+    return state, ts
+
+
+class EvaluateTests(unittest.TestCase):
+    """Unit-тесты проверки одного значения по скользящему состоянию."""
+
+    def test_normal_moves_are_accepted(self):
+        """Обычные колебания принимаются и накапливают EWMA."""
+        state, _ = _warm_state()
+        self.assertEqual(state.count, 49)
+        self.assertGreater(state.var, 0)
+        self.assertEqual(len(state.recent), CONFIG.window)
+
+    def test_spike_is_quarantined_and_state_not_polluted(self):
+        """Одиночный выброс уходит в карантин и не меняет EWMA/последнюю цену."""
+        state, ts = _warm_state()
+        mean, var, last_price = state.mean, state.var, state.last_price
+
+        reason, score = evaluate(state, 150.0, ts, CONFIG)
+
+        self.assertEqual(reason, OUTLIER)
+        self.assertGreater(score, CONFIG.z_threshold)
+        self.assertEqual(
+            (state.mean, state.var, state.last_price), (mean, var, last_price)
+        )
+
+        reason, _ = evaluate(state, 100.05, ts + 60, CONFIG)
+        self.assertIsNone(reason)
+
+    def test_persistent_level_shift_is_accepted_eventually(self):
+        """Устойчивый сдвиг уровня принимается, когда на него переходит медиана."""
+        state, ts = _warm_state()
+
+        reasons = []
+        for i in range(5):
+            reason, _ = evaluate(state, 150.0 + 0.01 * i, ts + 60 * i, CONFIG)
+            reasons.append(reason)
+
+        self.assertEqual(reasons[0], OUTLIER)
+        self.assertIsNone(reasons[-1])
+        self.assertAlmostEqual(state.last_price, 150.04)
+
+    def test_frozen_price_is_flagged_as_stale(self):
+        """Цена, не менявшаяся дольше stale_after_s, помечается как stale."""
+        state, ts = _warm_state()
+        price = state.last_raw
+
+        reasons = [evaluate(state, price, ts + 60 * i, CONFIG)[0] for i in range(1, 7)]
+
+        # Последнее изменение было на ts - 60: порог 300 с достигается на 4-м повторе
+        self.assertEqual(reasons[:3], [None, None, None])
+        self.assertEqual(reasons[3:], [STALE, STALE, STALE])
+
+    def test_no_checks_during_warmup(self):
+        """До накопления warmup доходностей выбросы не детектируются."""
+        state = TickerState()
+        evaluate(state, 100.0, 0, CONFIG)
+        reason, _ = evaluate(state, 200.0, 60, CONFIG)
+        self.assertIsNone(reason)
+
+    def test_state_roundtrip(self):
+        """Состояние сериализуется в Redis hash и обратно без потерь."""
+        state, _ = _warm_state()
+        restored = TickerState.from_mapping(
+            {k.encode(): v.encode() for k, v in state.to_mapping().items()}
+        )
+        self.assertEqual(restored, state)
+
+
+class PriceValidatorTests(unittest.TestCase):
+    """PriceValidator поверх in-memory Redis: разделение цен и метрики."""
+
+    def test_validate_splits_accepted_and_quarantined(self):
+        """Выброс уходит в аномалии, остальные цены принимаются; метрики считаются."""
+        redis = FakeRedis()
+        validator = PriceValidator(client=redis, config=CONFIG)
+
+        ts = 0
+        for i in range(30):
+            move = Decimal(1 + 0.001 * math.sin(i)).quantize(Decimal("0.00000001"))
+            validator.validate({"btc_usd": 40000 * move, "eth_usd": 2500 * move}, ts)
+            ts += 60
+
+        accepted, anomalies = validator.validate(
+            {"btc_usd": Decimal("80000"), "eth_usd": Decimal("2500.5")}, ts
+        )
+
+        self.assertEqual(list(accepted), ["eth_usd"])
+        self.assertEqual(len(anomalies), 1)
+        self.assertEqual(anomalies[0].ticker, "btc_usd")
+        self.assertEqual(anomalies[0].reason, OUTLIER)
+        self.assertEqual(anomalies[0].ts, ts)
+        self.assertEqual(validator.metrics("btc_usd"), {"checked": 31, "outlier": 1})
+
+    def test_validate_empty_cycle(self):
+        """Пустой цикл не обращается к состоянию."""
+        validator = PriceValidator(client=FakeRedis(), config=CONFIG)
+        self.assertEqual(validator.validate({}, 0), ({}, []))
+
+    def test_replayed_slot_with_unchanged_price_is_ignored(self):
+        """Повтор слота при неизменной цене не проверяется и не меняет состояние."""
+        redis = FakeRedis()
+        validator = PriceValidator(client=redis, config=CONFIG)
+        validator.validate({"btc_usd": Decimal("100")}, 60)
+        validator.validate({"btc_usd": Decimal("100")}, 120)
+        state_before = dict(redis.hashes["quality:state:btc_usd"])
+
+        accepted, anomalies = validator.validate({"btc_usd": Decimal("100")}, 120)
+
+        self.assertEqual((accepted, anomalies), ({}, []))
+        self.assertEqual(redis.hashes["quality:state:btc_usd"], state_before)
+        self.assertEqual(validator.metrics("btc_usd"), {"checked": 2, IGNORED: 1})
+
+    def test_late_sample_is_ignored(self):
+        """Опоздавшее значение (ts меньше последнего проверенного) игнорируется."""
+        redis = FakeRedis()
+        validator = PriceValidator(client=redis, config=CONFIG)
+        validator.validate({"btc_usd": Decimal("100")}, 60)
+        validator.validate({"btc_usd": Decimal("100")}, 120)
+
+        accepted, anomalies = validator.validate({"btc_usd": Decimal("101")}, 90)
+
+        self.assertEqual((accepted, anomalies), ({}, []))
+        state = TickerState.from_mapping(redis.hgetall("quality:state:btc_usd"))
+        self.assertEqual(state.count, 1)
+        self.assertEqual(state.last_price, 100.0)
+        self.assertEqual(state.last_changed_ts, 60)
+        self.assertEqual(state.last_seen_ts, 120)
+        self.assertEqual(state.recent, [100.0, 100.0])
+
+    def test_concurrent_update_is_not_lost(self):
+        """Изменение состояния другим процессом между чтением и записью не теряется."""
+
+        class RacingRedis(FakeRedis):
+            """Вклинивает конкурентную проверку после первого чтения состояния."""
+
+            race = None
+
+            def hgetall(self, name):
+                data = super().hgetall(name)
+                race, self.race = self.race, None
+                if race is not None:
+                    race()
+                return data
+
+        redis = RacingRedis()
+        validator = PriceValidator(client=redis, config=CONFIG)
+        other = PriceValidator(client=redis, config=CONFIG)
+        validator.validate({"btc_usd": Decimal("40000")}, 0)
+
+        redis.race = lambda: other.validate({"btc_usd": Decimal("40010")}, 60)
+        validator.validate({"btc_usd": Decimal("40020")}, 120)
+
+        state = TickerState.from_mapping(redis.hgetall("quality:state:btc_usd"))
+        self.assertEqual(state.count, 2)
+        self.assertEqual(state.recent, [40000.0, 40010.0, 40020.0])
+        self.assertEqual(state.last_changed_ts, 120)
+        self.assertEqual(validator.metrics("btc_usd"), {"checked": 3})
@@ -0,0 +1,174 @@
+import unittest
+from dataclasses import replace
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import get_settings
+from app.db import query_budget, session
+from app.services.prices_service import PriceService
+
+
+class QueryBudgetTests(unittest.TestCase):
+    """Unit-тесты бюджета запросов: лимиты строк, лог медленных запросов, отмена."""
+
+    def test_row_limit_scales_with_range(self):
+        """Лимит строк растёт с диапазоном (двойной запас к числу минутных точек)."""
+        self.assertEqual(query_budget.row_limit_for_range(0, 0, 1000), 2)
+        self.assertEqual(query_budget.row_limit_for_range(0, 600, 1000), 22)
+
+    def test_row_limit_is_capped(self):
+        """Лимит строк не превышает max_rows, а длинный диапазон не ошибка."""
+        year = 365 * 24 * 3600
+        self.assertEqual(query_budget.row_limit_for_range(0, year, 1000), 1000)
+
+    def test_ensure_within_row_limit(self):
+        """Лишняя строка сверх лимита означает, что диапазон не поместился."""
+        query_budget.ensure_within_row_limit(10, 10)
+        with self.assertRaises(query_budget.RowLimitExceeded):
+            query_budget.ensure_within_row_limit(11, 10)
+
+    def test_slow_query_is_logged(self):
+        """Запросы дольше порога попадают в лог медленных запросов."""
+        engine = create_engine("sqlite://")
+        query_budget.install_slow_query_log(engine, threshold_ms=0)
+
+        with self.assertLogs(query_budget.logger, level="WARNING") as logs:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        self.assertIn("Slow query", logs.output[0])
+        self.assertIn("SELECT 1", logs.output[0])
+
+    def test_fast_query_is_not_logged(self):
+        """Быстрые запросы не логируются."""
+        engine = create_engine("sqlite://")
+        query_budget.install_slow_query_log(engine, threshold_ms=60_000)
+
+        with self.assertNoLogs(query_budget.logger, level="WARNING"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+    def test_failed_query_leaves_no_state_on_connection(self):
+        """Упавший запрос не оставляет служебных данных в conn.info."""
+        engine = create_engine("sqlite://")
+        query_budget.install_slow_query_log(engine, threshold_ms=60_000)
+
+        with engine.connect() as conn:
+            info_before = dict(conn.info)
+            with self.assertLogs(query_budget.logger, level="WARNING"):
+                with self.assertRaises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing_table"))
+            conn.execute(text("SELECT 1"))
+
+            self.assertEqual(conn.info, info_before)
+
+    def test_failed_query_is_logged_with_elapsed_time(self):
+        """Упавший запрос (например, по statement timeout) попадает в лог."""
+        engine = create_engine("sqlite://")
+        query_budget.install_slow_query_log(engine, threshold_ms=60_000)
+
+        with self.assertLogs(query_budget.logger, level="WARNING") as logs:
+            with engine.connect() as conn:
+                with self.assertRaises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing_table"))
+
+        self.assertRegex(logs.output[0], r"Failed query \(\d+ ms\)")
+        self.assertIn("SELECT * FROM missing_table", logs.output[0])
+        self.assertIn("no such table", logs.output[0])
+
+    def test_cancel_running_query_uses_dbapi_cancel(self):
+        """cancel_running_query вызывает cancel() у DBAPI-соединения сессии."""
+        dbapi_connection = Mock()
+        db = SimpleNamespace(info={"dbapi_connection": dbapi_connection})
+
+        self.assertTrue(query_budget.cancel_running_query(db))
+        dbapi_connection.cancel.assert_called_once_with()
+
+    def test_cancel_running_query_without_connection(self):
+        """Без активного соединения отменять нечего."""
+        db = SimpleNamespace(info={})
+        self.assertFalse(query_budget.cancel_running_query(db))
+
+
+class DefaultStatementTimeoutTests(unittest.TestCase):
+    """statement_timeout по умолчанию задаётся при открытии соединения."""
+
+    def test_postgres_engine_sets_timeout_in_connect_options(self):
+        """Для PostgreSQL timeout передаётся в options, без запроса на каждый вызов."""
+        settings = replace(
+            get_settings(), database_url="postgresql+psycopg2://u:p@db/prices"
+        )
+        with (
+            patch("app.db.session.get_settings", return_value=settings),
+            patch("app.db.session.create_engine") as create_engine_mock,
+            patch("app.db.session.install_slow_query_log"),
+        ):
+            session.create_db_engine()
+
+        connect_args = create_engine_mock.call_args.kwargs["connect_args"]
+        self.assertEqual(
+            connect_args,
+            {"options": f"-c statement_timeout={settings.statement_timeout_ms}"},
+        )
+
+    def test_latest_does_not_set_timeout_per_request(self):
+        """/prices/latest обходится одним запросом к БД."""
+        db = Mock()
+        PriceService(db).get_latest("btc_usd")
+
+        db.execute.assert_not_called()
+        db.get.assert_called_once()
+
+
+class PriceServiceRowLimitTests(unittest.TestCase):
+    """PriceService.get_by_date: 413 только при фактическом переполнении лимита."""
+
+    def _get_by_date(self, rows_in_db: int, to_ts: int):
+        def get_prices_by_date(_db, _ticker, _from_ts, _to_ts, limit):
+            return list(range(min(rows_in_db, limit)))
+
+        with (
+            patch("app.services.prices_service.apply_statement_timeout"),
+            patch(
+                "app.services.prices_service.crud.get_prices_by_date",
+                side_effect=get_prices_by_date,
+            ) as crud_call,
+        ):
+            result = PriceService(Mock()).get_by_date("btc_usd", 0, to_ts)
+        return result, crud_call.call_args.kwargs["limit"]
+
+    def test_long_range_with_few_rows_is_returned(self):
+        """Диапазон с from_ts=0 не отклоняется, если строк в нём немного."""
+        rows, limit = self._get_by_date(rows_in_db=1440, to_ts=1_700_000_000)
+
+        self.assertEqual(len(rows), 1440)
+        self.assertEqual(limit, get_settings().max_rows + 1)
+
+    def test_overflowing_range_is_rejected(self):
+        """Если строк больше лимита, ответ не усекается, а отклоняется."""
+        with self.assertRaises(query_budget.RowLimitExceeded):
+            self._get_by_date(rows_in_db=10**6, to_ts=1_700_000_000)
+
+
+class CancelOnDisconnectTests(unittest.IsolatedAsyncioTestCase):
+    """Отмена запроса при отключении клиента."""
+
+    async def test_cancels_query_when_client_disconnects(self):
+        """После отключения клиента запрос сессии отменяется."""
+        states = iter([False, False, True])
+
+        async def is_disconnected():
+            return next(states)
+
+        request = SimpleNamespace(
+            is_disconnected=is_disconnected, url=SimpleNamespace(path="/prices")
+        )
+        dbapi_connection = Mock()
+        db = SimpleNamespace(info={"dbapi_connection": dbapi_connection})
+
+        await query_budget.cancel_on_disconnect(request, db, poll_interval_s=0)
+
+        dbapi_connection.cancel.assert_called_once_with()
@@ -0,0 +1,106 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+
+from app.db import session
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+
+# Бюджеты на холодный импорт (секунды) — защищают cold start контейнеров.
+# Взяты с небольшим запасом к измеренному (API ~0.7 с, Celery app ~0.4 с);
+# проверяется лучшее из нескольких запусков, чтобы не ловить шум CI.
+API_IMPORT_BUDGET_S = 0.9
+WORKER_IMPORT_BUDGET_S = 0.55
+PROBE_RUNS = 3
+
+_PROBE = """
+import json, sys, time
+
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+
+from app.db.session import get_engine
+
+print(json.dumps({{
+    "elapsed": elapsed,
+    "dbapi_loaded": "psycopg2" in sys.modules,
+    "numpy_loaded": "numpy" in sys.modules,
+    "tasks_loaded": "worker.tasks" in sys.modules,
+    "engine_built": get_engine.cache_info().currsize > 0,
+    "celery_built": (
+        "worker.celery_app" in sys.modules
+        and sys.modules["worker.celery_app"].get_celery_app.cache_info().currsize > 0
+    ),
+}}))
+"""
+
+
+class StartupTests(unittest.TestCase):
+    """Проверяем, что импорт модулей дёшев и не создаёт Engine/Celery app."""
+
+    def _run_probe(self, module: str) -> dict:
+        env = {k: v for k, v in os.environ.items() if k != "DATABASE_URL"}
+        results = []
+        for _ in range(PROBE_RUNS):
+            proc = subprocess.run(
+                [sys.executable, "-c", _PROBE.format(module=module)],
+                cwd=BASE_DIR,
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        return min(results, key=lambda result: result["elapsed"])
+
+    def test_api_import_is_lazy_and_within_budget(self):
+        """Импорт API без DATABASE_URL ничего не строит и укладывается в бюджет."""
+        result = self._run_probe("app.main")
+
+        self.assertFalse(result["dbapi_loaded"])
+        self.assertFalse(result["engine_built"])
+        self.assertLess(result["elapsed"], API_IMPORT_BUDGET_S)
+
+    def test_worker_import_is_lazy_and_within_budget(self):
+        """Импорт Celery app не тянет задачи (ORM, NumPy) и не строит приложение."""
+        result = self._run_probe("worker.celery_app")
+
+        self.assertFalse(result["dbapi_loaded"])
+        self.assertFalse(result["tasks_loaded"])
+        self.assertFalse(result["numpy_loaded"])
+        self.assertFalse(result["engine_built"])
+        self.assertFalse(result["celery_built"])
+        self.assertLess(result["elapsed"], WORKER_IMPORT_BUDGET_S)
+
+
+class WarmUpTests(unittest.TestCase):
+    """Прогрев пула при старте API."""
+
+    def test_warm_up_leaves_connection_in_pool(self):
+        """После прогрева в пуле лежит открытое соединение."""
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{tmp}/warmup.db")
+            self.addCleanup(engine.dispose)
+            with patch("app.db.session.get_engine", return_value=engine):
+                session.warm_up_pool()
+
+            self.assertEqual(engine.pool.checkedin(), 1)
+
+    def test_unavailable_database_does_not_block_startup(self):
+        """Если БД недоступна, прогрев логирует ошибку и не падает."""
+        engine = create_engine("sqlite:////nonexistent-dir/warmup.db")
+        with (
+            patch("app.db.session.get_engine", return_value=engine),
+            self.assertLogs(session.logger, level=logging.WARNING),
+        ):
+            session.warm_up_pool()
@@ -1,15 +1,66 @@
 """
 Celery application для периодической загрузки цен индексов.
+
+Приложение создаётся лениво: `celery_app` доступен как атрибут модуля
+(`celery -A worker.celery_app:celery_app`), но строится только при первом обращении.
 """
 
+import time
 from functools import lru_cache
 
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import (
+    before_task_publish,
+    celeryd_after_setup,
+    worker_process_shutdown,
+    worker_shutdown,
+)
+
+from app.core.config import configure_logging, get_settings
+from app.db.session import dispose_engine
+from app.services.cluster import get_node_registry, node_queue
+from worker.heartbeat import NodeHeartbeat
+from worker.schedule import DISPATCH_TASK, FETCH_INTERVAL_S, SCHEDULED_TS_HEADER
+
+_heartbeats: list[NodeHeartbeat] = []
+
+
+def _on_worker_process_shutdown(**_kwargs) -> None:
+    dispose_engine()
+
+
+def _on_worker_setup(sender: str, instance, **_kwargs) -> None:
+    """
+    Регистрирует worker как узел сбора цен: персональная очередь ingest.<nodename>
+    и heartbeat в реестре узлов.
+    """
+    instance.app.amqp.queues.select_add(node_queue(sender))
 
-from app.core.config import get_settings
+    settings = get_settings()
+    heartbeat = NodeHeartbeat(
+        get_node_registry(), sender, interval_s=settings.node_ttl_s / 3
+    )
+    heartbeat.start()
+    _heartbeats.append(heartbeat)
+
+
+def _on_worker_shutdown(**_kwargs) -> None:
+    while _heartbeats:
+        _heartbeats.pop().stop()
+
+
+def _on_before_task_publish(sender: str, headers: dict, **_kwargs) -> None:
+    """
+    Помечает сообщения dispatch_price_fetch временем публикации — моментом
+    срабатывания beat, по которому задача определяет слот.
+    """
+    if sender == DISPATCH_TASK:
+        headers.setdefault(SCHEDULED_TS_HEADER, time.time())
 
 
 def _build_celery_app() -> Celery:
+    configure_logging()
     settings = get_settings()
     app = Celery(
         "deribit_price_tracker",
@@ -19,11 +70,23 @@ def _build_celery_app() -> Celery:
     )
     app.conf.timezone = "UTC"
     app.conf.beat_schedule = {
-        "fetch-index-prices-every-minute": {
-            "task": "worker.tasks.fetch_and_store_prices",
-            "schedule": 60.0,
-        }
+        # crontab выравнивает запуск по началу минуты; beat можно запускать
+        # в нескольких экземплярах — слот обработает только один (SlotLeader)
+        "dispatch-index-prices-every-minute": {
+            "task": DISPATCH_TASK,
+            "schedule": crontab(),
+            # Диспетчеризация, не начавшаяся до конца своего слота, не нужна
+            "options": {"expires": FETCH_INTERVAL_S},
+        },
+        "flush-price-buffer": {
+            "task": "worker.tasks.flush_price_buffer",
+            "schedule": 30.0,
+        },
     }
+    worker_process_shutdown.connect(_on_worker_process_shutdown, weak=False)
+    celeryd_after_setup.connect(_on_worker_setup, weak=False)
+    worker_shutdown.connect(_on_worker_shutdown, weak=False)
+    before_task_publish.connect(_on_before_task_publish, weak=False)
     return app
 
 
@@ -31,4 +94,8 @@ def _build_celery_app() -> Celery:
 def get_celery_app() -> Celery:
     return _build_celery_app()
 
-celery_app = get_celery_app()
+
+def __getattr__(name: str) -> Celery:
+    if name == "celery_app":
+        return get_celery_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
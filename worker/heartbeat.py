@@ -0,0 +1,48 @@
+"""
+Heartbeat узла сбора цен: держит узел в реестре (NodeRegistry), пока жив worker.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+
+from app.services.cluster import NodeRegistry
+
+logger = logging.getLogger(__name__)
+
+
+class NodeHeartbeat:
+    """
+    Фоновый поток, периодически обновляющий heartbeat узла.
+    При остановке узел сразу удаляется из реестра — шарды перераспределяются
+    со следующего слота, не дожидаясь истечения TTL.
+    """
+
+    def __init__(self, registry: NodeRegistry, node: str, interval_s: float):
+        self._registry = registry
+        self._node = node
+        self._interval_s = interval_s
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"heartbeat-{node}", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join(timeout=self._interval_s)
+        try:
+            self._registry.leave(self._node)
+        except Exception as e:
+            logger.warning(f"Failed to deregister node {self._node}: {e}")
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._registry.heartbeat(self._node)
+            except Exception as e:
+                logger.warning(f"Heartbeat of node {self._node} failed: {e}")
+            self._stopped.wait(self._interval_s)
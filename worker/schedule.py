@@ -0,0 +1,15 @@
+"""
+Параметры расписания сбора цен, общие для Celery app (beat) и задач.
+
+Вынесены в отдельный лёгкий модуль, чтобы импорт worker.celery_app
+не тянул worker.tasks (ORM, Redis, NumPy).
+"""
+
+# Имя задачи-диспетчера, которую beat запускает раз в слот
+DISPATCH_TASK = "worker.tasks.dispatch_price_fetch"
+
+# Период слота расписания (совпадает с crontab beat'а)
+FETCH_INTERVAL_S = 60
+
+# Заголовок сообщения dispatch_price_fetch: время срабатывания beat (UNIX, float)
+SCHEDULED_TS_HEADER = "scheduled_ts"
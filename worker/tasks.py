@@ -2,14 +2,28 @@ import logging
 import time
 
 from celery import shared_task
+from sqlalchemy.exc import InterfaceError, OperationalError
 
 from app.core.config import get_settings
-from app.db.crud import save_prices
+from app.db.crud import save_anomaly_rows, save_price_rows
 from app.db.deps import get_db_context
+from app.services.cluster import (
+    HashRing,
+    get_node_registry,
+    get_slot_leader,
+    node_queue,
+)
 from app.services.deribit_client import DeribitClient, DeribitError
+from app.services.price_buffer import PriceRow, get_price_buffer
+from app.services.price_quality import get_price_validator
+from worker.schedule import FETCH_INTERVAL_S, SCHEDULED_TS_HEADER
 
 logger = logging.getLogger(__name__)
 
+# Ошибки БД, после которых перенос буфера стоит повторить позже (БД недоступна);
+# остальные ошибки сохранения постоянны и уводят запись в dead letters
+TRANSIENT_DB_ERRORS = (OperationalError, InterfaceError)
+
 
 @shared_task(
     name="worker.tasks.fetch_and_store_prices",
@@ -18,9 +32,18 @@ logger = logging.getLogger(__name__)
     retry_backoff=True,
     retry_jitter=True,
 )
-def fetch_and_store_prices():
+def fetch_and_store_prices(tickers: list[str] | None = None, ts: int | None = None):
     """
-    Celery task: раз в минуту получает index price по тикерам и сохраняет в БД.
+    Celery task: получает index price по тикерам, проверяет их качество
+    (см. PriceValidator) и дописывает в write-ahead буфер (см. PriceBuffer),
+    после чего ставит в очередь перенос в БД. Выбросы и замёрзшие значения
+    уходят в карантин (price_anomalies) вместо prices.
+
+    Обычно запускается из dispatch_price_fetch с шардом тикеров узла и ts слота;
+    без аргументов собирает все settings.tickers на текущий момент.
+
+    Задача не обращается к БД, поэтому недоступность Postgres не приводит
+    к потере уже полученных цен.
 
     Сохраняет:
       - ticker
@@ -28,23 +51,45 @@ def fetch_and_store_prices():
       - ts (UNIX timestamp, seconds)
     """
     settings = get_settings()
-    ts = int(time.time())
-    logger.info(f"Starting price fetch task at timestamp {ts}")
+    if tickers is None:
+        tickers = list(settings.tickers)
+    if ts is None:
+        ts = int(time.time())
+    logger.info(f"Starting price fetch task at timestamp {ts} for {tickers}")
 
     try:
         client = DeribitClient(base_url=settings.deribit_base_url)
-        prices = client.get_index_prices(settings.tickers)
+        prices = client.get_index_prices(tickers)
 
         logger.info(f"Fetched prices: {prices}")
 
-        # Используем контекстный менеджер для правильной работы с сессией
-        with get_db_context() as session:
-            saved_count = save_prices(session, prices, ts)
+        accepted, anomalies = get_price_validator().validate(prices, ts)
 
+        entry_id = get_price_buffer().append(
+            accepted,
+            ts,
+            anomalies=[
+                {
+                    "ticker": a.ticker,
+                    "price": a.price,
+                    "reason": a.reason,
+                    "score": a.score,
+                }
+                for a in anomalies
+            ],
+        )
         logger.info(
-            f"Successfully saved {saved_count} prices out of {len(prices)} requested"
+            f"Buffered {len(accepted)} prices "
+            f"({len(anomalies)} quarantined) as entry {entry_id}"
         )
-        return {"ts": ts, "prices": prices, "saved_count": saved_count}
+
+        flush_price_buffer.delay()
+        return {
+            "ts": ts,
+            "prices": prices,
+            "buffered_count": len(accepted),
+            "quarantined": {a.ticker: a.reason for a in anomalies},
+        }
 
     except DeribitError as e:
         logger.error(f"Deribit API error: {e}")
@@ -52,3 +97,88 @@ def fetch_and_store_prices():
     except Exception as e:
         logger.error(f"Unexpected error in price fetch task: {e}")
         raise
+
+
+@shared_task(name="worker.tasks.dispatch_price_fetch", bind=True)
+def dispatch_price_fetch(self):
+    """
+    Celery task (beat, раз в минуту): распределяет тикеры по живым узлам.
+
+    Слот определяется по времени срабатывания beat (заголовок scheduled_ts,
+    см. worker.celery_app), а не по времени выполнения: задача, простоявшая
+    в очереди до следующей минуты, не займёт чужой слот. Слот обрабатывает
+    только один вызов — первый, захвативший лидерство слота, поэтому beat
+    можно запускать в нескольких экземплярах. Тикеры раскладываются по узлам
+    консистентным хешированием; при появлении или уходе узла шарды
+    перераспределяются со следующего слота.
+    """
+    settings = get_settings()
+    scheduled_ts = getattr(self.request, SCHEDULED_TS_HEADER, None)
+    if scheduled_ts is None:
+        scheduled_ts = time.time()
+    slot = int(scheduled_ts) // FETCH_INTERVAL_S
+    ts = slot * FETCH_INTERVAL_S
+    dispatcher = self.request.hostname or "unknown"
+
+    if not get_slot_leader().try_lead(slot, dispatcher):
+        logger.info(f"Slot {slot} is already dispatched by another scheduler")
+        return {"slot": slot, "dispatched": False}
+
+    nodes = get_node_registry().live_nodes()
+    if not nodes:
+        logger.warning("No live ingest nodes registered, using the default queue")
+        fetch_and_store_prices.apply_async(
+            kwargs={"tickers": list(settings.tickers), "ts": ts},
+            expires=FETCH_INTERVAL_S,
+        )
+        return {"slot": slot, "dispatched": True, "assignment": {}}
+
+    assignment = HashRing(nodes).assign(settings.tickers)
+    for node, tickers in assignment.items():
+        fetch_and_store_prices.apply_async(
+            kwargs={"tickers": list(tickers), "ts": ts},
+            queue=node_queue(node),
+            # Сообщения в очередь упавшего узла не должны выполниться с опозданием
+            expires=FETCH_INTERVAL_S,
+        )
+
+    logger.info(f"Slot {slot} dispatched: {assignment}")
+    return {"slot": slot, "dispatched": True, "assignment": assignment}
+
+
+def _save_rows(rows: list[PriceRow], anomalies: list[PriceRow]) -> int:
+    with get_db_context() as session:
+        save_anomaly_rows(session, anomalies)
+        return save_price_rows(session, rows)
+
+
+@shared_task(name="worker.tasks.flush_price_buffer")
+def flush_price_buffer():
+    """
+    Celery task: переносит накопленные в буфере цены в БД пачками.
+
+    Запускается после каждого сбора цен и периодически из beat; если БД
+    недоступна, записи остаются в буфере до следующего запуска. Записи,
+    которые не сохраняются по другим причинам (нарушение ограничений,
+    некорректные данные), уходят в dead-letter поток буфера.
+    """
+    settings = get_settings()
+    buffer = get_price_buffer()
+
+    try:
+        saved_count = buffer.flush(
+            _save_rows,
+            settings.price_buffer_flush_batch,
+            transient_errors=TRANSIENT_DB_ERRORS,
+        )
+    except TRANSIENT_DB_ERRORS as e:
+        pending = buffer.pending()
+        logger.warning(f"Database unavailable, {pending} buffered entries kept: {e}")
+        return {"saved_count": 0, "pending": pending}
+
+    logger.info(f"Flushed {saved_count} buffered prices to the database")
+    return {
+        "saved_count": saved_count,
+        "pending": buffer.pending(),
+        "dead_letters": buffer.dead_letters(),
+    }